@@ -2,10 +2,30 @@
 from __future__ import annotations
 
 import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
-from settings import SZKB_DIR, SZKB_CSV
-from providers.szkb_provider import SZKBProvider, extract_text_from_pdf
+from settings import SZKB_DIR, SZKB_CSV, TEXT_CACHE_DIR
+from providers.szkb_provider import SZKBProvider
+from providers.pdf_text import extract_text_if_match
+from providers.base_provider import InvoiceProvider
+
+
+def read_pdf(provider: InvoiceProvider, pdf_path: Path) -> tuple[Path, str | None, str | None]:
+    """
+    Worker für den Prozess-Pool: PDF -> (Pfad, Text, Fehlermeldung).
+    Passt der ganze Text nicht zum Provider, ist Text None (die Keywords
+    dürfen auf jeder Seite stehen). Der Text kommt aus dem Text-Cache oder
+    wird einmal komplett extrahiert; gebraucht wird er zum Parsen ohnehin.
+    Fehler werden als String zurückgegeben, damit ein defektes PDF
+    nicht den ganzen Lauf abbricht.
+    """
+    try:
+        return pdf_path, extract_text_if_match(pdf_path, provider.matches, TEXT_CACHE_DIR), None
+    except Exception as e:
+        return pdf_path, None, str(e)
 
 
 def main():
@@ -18,7 +38,13 @@ def main():
         print(f"[HINWEIS] SZKB-Ordner existiert nicht: {pdf_dir}")
         return
 
-    pdf_files = sorted(p for p in pdf_dir.glob("*.pdf") if p.is_file())
+    # os.scandir: is_file() nutzt den Dateityp aus dem Verzeichniseintrag,
+    # kein extra stat() pro Datei (merklich auf OneDrive/Netzlaufwerken)
+    with os.scandir(pdf_dir) as it:
+        pdf_files = sorted(
+            (Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()),
+            key=lambda p: p.name,
+        )
 
     print("========== SZKB CSV Builder ==========")
     print(f"PDF-Ordner: {pdf_dir}")
@@ -27,41 +53,37 @@ def main():
 
     # CSV neu schreiben (überschreiben)
     csv_path.parent.mkdir(parents=True, exist_ok=True)
-    with csv_path.open("w", newline="", encoding="utf-8") as f:
+    with csv_path.open("w", newline="", encoding="utf-8", buffering=1024 * 1024) as f:
         writer = csv.writer(f, delimiter=";")
         writer.writerow(provider.csv_header)
 
-        written = 0
+        rows = []
         skipped_not_matching = 0
         errors = 0
 
-        for pdf_path in pdf_files:
-            try:
-                text = extract_text_from_pdf(pdf_path)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {e}")
-                errors += 1
-                continue
-
-            if not provider.matches(text):
-                skipped_not_matching += 1
-                continue
-
-            data = provider.parse_invoice(text, pdf_path.name)
-
-            from_date = data.get("from_date", "") or ""
-            to_date = data.get("to_date", "") or ""
-            saldo_num = data.get("saldo", None)
-            filename = data.get("file", pdf_path.name)
-
-            if saldo_num is None:
-                saldo_str_num = ""
-            else:
-                saldo_str_num = f"{float(saldo_num):.2f}"
-
-            # ["Von_Datum", "Bis_Datum", "Schlusssaldo_num", "Datei"]
-            writer.writerow([from_date, to_date, saldo_str_num, filename])
-            written += 1
+        # Text-Extraktion parallel, Auswertung + CSV bleiben im Hauptprozess
+        # (map() liefert in Eingabereihenfolge -> CSV bleibt nach Dateiname sortiert)
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(partial(read_pdf, provider), pdf_files, chunksize=4)
+
+            for pdf_path, text, error in results:
+                if error is not None:
+                    print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {error}")
+                    errors += 1
+                    continue
+
+                if text is None:
+                    # passt nicht zum Provider
+                    skipped_not_matching += 1
+                    continue
+
+                data = provider.parse_invoice(text, pdf_path.name)
+                # Reihenfolge gemäss provider.csv_header
+                rows.append(provider.csv_row(data))
+
+        # alle Zeilen in einem Rutsch schreiben (Reihenfolge wie pdf_files)
+        writer.writerows(rows)
+        written = len(rows)
 
     print("\n========== Zusammenfassung ==========")
     print(f"Verarbeitete PDFs insgesamt:      {len(pdf_files)}")
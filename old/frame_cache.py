@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Pickle-Cache für eingelesene CSVs der Report-Skripte (swisscom_report.py
+hier, v0/yearly_report.py über repo_root.import_shared).
+
+Solange eine CSV unverändert ist (Pfad, mtime, Grösse), kommt das Ergebnis
+der Lade-Funktion aus dem Pickle, ohne CSV-Parsing und Datumsumwandlung.
+Eine Cache-Datei pro CSV-Pfad; nach jedem Schreiben bleiben nur die
+MAX_ENTRIES zuletzt benutzten stehen.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Callable, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+MAX_ENTRIES = 16
+
+
+def _prune(cache_dir: Path, keep: Path) -> None:
+    """
+    Älteste Einträge (mtime = letzte Benutzung) und liegengebliebene
+    Temp-Dateien (abgebrochener Lauf, älter als eine Stunde) löschen.
+    Nur Aufräumen: Fehler (z.B. paralleler Lauf) werden ignoriert.
+    """
+    try:
+        now = time.time()
+        for tmp in cache_dir.glob("*.tmp"):
+            if now - tmp.stat().st_mtime > 3600:
+                tmp.unlink(missing_ok=True)
+        entries = sorted(
+            ((p.stat().st_mtime_ns, p) for p in cache_dir.glob("*.pkl") if p != keep),
+            reverse=True,
+        )
+        for _, old in entries[MAX_ENTRIES - 1:]:
+            old.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def load_cached(csv_path: str, load: Callable[[str], T], cache_dir: Path, extra_key: tuple = ()) -> T:
+    """
+    load(csv_path) über cache_dir. extra_key ergänzt den Schlüssel um
+    Parameter, die das Ergebnis ändern (z.B. den Separator).
+    """
+    csv_path = os.path.abspath(csv_path)
+    if not os.path.exists(csv_path):
+        return load(csv_path)  # gleiche Fehlermeldung
+
+    st = os.stat(csv_path)
+    key = (csv_path, st.st_mtime_ns, st.st_size, *extra_key)
+    name = hashlib.blake2b(csv_path.encode("utf-8"), digest_size=8).hexdigest()
+    cache_file = cache_dir / f"{name}.pkl"
+
+    try:
+        cached_key, value = pd.read_pickle(cache_file)
+        if cached_key == key:
+            os.utime(cache_file)  # als zuletzt benutzt markieren
+            return value
+    except Exception:
+        pass  # kein, unlesbarer oder mit anderer pandas-Version geschriebener Eintrag
+
+    value = load(csv_path)
+
+    # erst in eine Temp-Datei, dann ersetzen: nie ein halb geschriebener Eintrag
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        pd.to_pickle((key, value), tmp)
+        os.replace(tmp, cache_file)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _prune(cache_dir, keep=cache_file)
+    return value
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import os
 import argparse
+from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # nur PDFs schreiben, kein GUI-Backend (vor pyplot setzen)
 import matplotlib.pyplot as plt
 
+from frame_cache import load_cached  # gemeinsamer CSV-Cache (auch v0/yearly_report.py)
+
 # === EINSTELLUNGEN ANPASSEN ===
 BASE_DIR = r"D:\Projekte_OneDrive\OneDrive\Privat\Zur_Ablage\swisscom"  # z.B. r"C:\Users\Roman\Documents\Rechnungen"
 CSV_NAME = "swisscom.csv"                    # oder "swisscom.cvs" falls du das so genannt hast
@@ -11,12 +16,27 @@ CSV_NAME = "swisscom.csv"                    # oder "swisscom.cvs" falls du das
 MONTH_LABELS = ["Jan", "Feb", "Mrz", "Apr", "Mai", "Jun",
                 "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
 
+# Nur diese Spalten werden gebraucht; Datum als Text für to_datetime
+USED_COLUMNS = {"Rechnungsdatum", "Betrag_num"}
+CSV_DTYPES = {"Rechnungsdatum": str}
+# Datumsformat des CSV-Builders; fest vorgegeben statt dayfirst-Erkennung
+CSV_DATE_FMT = "%d.%m.%Y"
+
+# Eingelesene CSV (neben dem Skript); siehe load_data_cached
+CSV_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
 
 def load_data(csv_path: str) -> pd.DataFrame:
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV-Datei nicht gefunden: {csv_path}")
 
-    df = pd.read_csv(csv_path, sep=";", encoding="utf-8")
+    df = pd.read_csv(
+        csv_path,
+        sep=";",
+        encoding="utf-8",
+        usecols=lambda c: c in USED_COLUMNS,
+        dtype=CSV_DTYPES,
+    )
 
     # Erwartete Spalten:
     # "Rechnungsdatum", "Betrag_roh", "Betrag_num", "Datei"
@@ -26,7 +46,7 @@ def load_data(csv_path: str) -> pd.DataFrame:
     # Datum parsen (TT.MM.JJJJ)
     df["Rechnungsdatum"] = pd.to_datetime(
         df["Rechnungsdatum"],
-        dayfirst=True,
+        format=CSV_DATE_FMT,
         errors="coerce"
     )
 
@@ -39,16 +59,36 @@ def load_data(csv_path: str) -> pd.DataFrame:
     return df
 
 
-def create_yearly_overview(df: pd.DataFrame, year: int, output_path: str):
-    # Daten fuer das angegebene Jahr filtern
-    df_year = df[df["Rechnungsdatum"].dt.year == year]
+def load_data_cached(csv_path: str) -> pd.DataFrame:
+    """
+    Wie load_data(), aber über CSV_CACHE_DIR (frame_cache.py):
+    solange die CSV unverändert ist (Pfad, mtime, Grösse), kommt das
+    DataFrame aus dem Pickle, ohne CSV-Parsing und Datumsumwandlung.
+    """
+    return load_cached(csv_path, load_data, CSV_CACHE_DIR)
+
+
+def monthly_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monatssummen ('sum') und Anzahl Rechnungen ('count') über alle Jahre in
+    einem resample-Durchlauf; Index = Monatsanfang.
+    """
+    return df.set_index("Rechnungsdatum")["Betrag_num"].resample("MS").agg(["sum", "count"])
+
+
+def create_yearly_overview(df: pd.DataFrame, year: int, output_path: str,
+                           monthly_all: pd.DataFrame | None = None):
+    # Monatssummen: vorberechnet (monthly_totals) oder hier aus df
+    if monthly_all is None:
+        monthly_all = monthly_totals(df)
 
-    if df_year.empty:
+    # Monate des angegebenen Jahres
+    months = monthly_all[monthly_all.index.year == year]
+    count = int(months["count"].sum())
+    if count == 0:
         raise ValueError(f"Keine Daten fuer das Jahr {year} gefunden.")
 
-    # Monatsweise summieren
-    df_year["Monat"] = df_year["Rechnungsdatum"].dt.month
-    monthly = df_year.groupby("Monat")["Betrag_num"].sum()
+    monthly = months["sum"].set_axis(months.index.month)
 
     # Sicherstellen, dass alle 12 Monate vorhanden sind
     monthly = monthly.reindex(range(1, 13), fill_value=0.0)
@@ -72,7 +112,7 @@ def create_yearly_overview(df: pd.DataFrame, year: int, output_path: str):
     text = (
         f"Jahr: {year}\n"
         f"Total Swisscom-Zahlungen: {total:.2f} CHF\n"
-        f"Anzahl Rechnungen: {len(df_year)}"
+        f"Anzahl Rechnungen: {count}"
     )
     # Text in der Grafik platzieren
     plt.gcf().text(
@@ -102,10 +142,11 @@ def main():
     base_dir = BASE_DIR
     csv_path = os.path.join(base_dir, CSV_NAME)
 
-    df = load_data(csv_path)
+    df = load_data_cached(csv_path)
 
-    # Verfuegbare Jahre ermitteln
-    years = sorted(df["Rechnungsdatum"].dt.year.unique())
+    # Monatssummen einmal berechnen, daraus auch die verfuegbaren Jahre
+    monthly_all = monthly_totals(df)
+    years = sorted(monthly_all.index[monthly_all["count"] > 0].year.unique())
     if not years:
         print("Keine gueltigen Daten im CSV gefunden.")
         return
@@ -122,7 +163,7 @@ def main():
     output_name = f"swisscom_report_{year}.pdf"
     output_path = os.path.join(base_dir, output_name)
 
-    create_yearly_overview(df, year, output_path)
+    create_yearly_overview(df, year, output_path, monthly_all=monthly_all)
 
 
 if __name__ == "__main__":
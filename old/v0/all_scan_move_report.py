@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import argparse
-import subprocess
 import sys
 from pathlib import Path
 
@@ -17,6 +16,13 @@ from settings import (
     STROM_DIR,
 )
 
+# Skripte direkt importieren statt pro Aufruf einen neuen Interpreter zu starten
+# (pdfplumber/pandas/matplotlib werden so nur einmal geladen)
+from scan_move_swisscom import main as scan_swisscom
+from scan_move_swisscard import main as scan_swisscard
+from scan_move_szkb_privatkonto import main as scan_szkb
+from yearly_report import main as yearly
+
 
 def main():
     parser = argparse.ArgumentParser(description="Einfacher Rechnungsreport-Runner")
@@ -31,47 +37,31 @@ def main():
     print("PYTHON_EXE:", PYTHON_EXE)
     print("===============================================\n")
 
-    # Python-Exe als String
-    py = str(PYTHON_EXE)
-
     # ---------------------------------------------------------
     # Swisscom
     # ---------------------------------------------------------
-    subprocess.check_call([py, str(SCRIPT_DIR / "scan_move_swisscom.py")])
-    subprocess.check_call([
-        py, str(SCRIPT_DIR / "yearly_report.py"),
-        "--csv", str(SWISSCOM_CSV),
-        "--label", "Swisscom",
-        "--year", str(year),
-    ])
+    scan_swisscom()
+    yearly(csv=str(SWISSCOM_CSV), label="Swisscom", year=year)
 
     # ---------------------------------------------------------
     # Swisscard
     # ---------------------------------------------------------
-    subprocess.check_call([py, str(SCRIPT_DIR / "scan_move_swisscard.py")])
-    subprocess.check_call([
-        py, str(SCRIPT_DIR / "yearly_report.py"),
-        "--csv", str(SWISSCARD_CSV),
-        "--label", "Swisscard",
-        "--year", str(year),
-    ])
+    scan_swisscard()
+    yearly(csv=str(SWISSCARD_CSV), label="Swisscard", year=year)
 
     # ---------------------------------------------------------
     # SZKB Privatkonto
     # ---------------------------------------------------------
-    subprocess.check_call([py, str(SCRIPT_DIR / "scan_move_szkb_privatkonto.py")])
-    subprocess.check_call([
-        py, str(SCRIPT_DIR / "yearly_report.py"),
-        "--csv", str(SZKB_CSV),
-        "--label", "SZKB_Privatkonto",
-        "--year", str(year),
-    ])
+    scan_szkb()
+    yearly(csv=str(SZKB_CSV), label="SZKB_Privatkonto", year=year)
 
     """
 
     # ---------------------------------------------------------
-    # Strom
+    # Strom (deaktiviert; läuft noch als eigener Prozess)
     # ---------------------------------------------------------
+    import subprocess
+    py = str(PYTHON_EXE)
     subprocess.check_call([py, str(SCRIPT_DIR / "scan_move_strom.py")])
     subprocess.check_call([
         py, str(SCRIPT_DIR / "strom_table_verify.py"),
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""
+Betrags-Normalisierung für die v0-Skripte: dieselbe Implementierung wie für
+die Provider (providers/amount.py).
+"""
+from repo_root import import_shared
+
+normalize_amount = import_shared("amount").normalize_amount
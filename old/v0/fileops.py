@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""
+Datei-Hilfen für die v0-Skripte: dieselbe Implementierung wie im Sorter
+(providers/fileops.py).
+"""
+from repo_root import import_shared
+
+move_file = import_shared("fileops").move_file
@@ -3,31 +3,33 @@ import os
 import re
 import csv
 import argparse
+import bisect
+import functools
+import itertools
+from datetime import datetime
 from pathlib import Path
 
-import pdfplumber
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
+from amount import normalize_amount
+from text_cache import get_text, prune
+
 BASE_DIR_DEFAULT = r"D:\Projekte_OneDrive\OneDrive\Privat\Zur_Ablage"
 STATEMENT_SUBFOLDER_DEFAULT = "szkb_privatkonto"
 DEFAULT_TYPES = ["E-Banking-Auftrag", "Gutschrift", "Belastung", "eBill-Rechnung"]
 
+# Vorkompilierte Muster fuer die Zeilenschleife in scan_payee_bookings
+DATE_RE = re.compile(r"\b\d{2}\.\d{2}\.(?:\d{2}|\d{4})\b")
+RE_DATE_DDMMYY = re.compile(r"(\d{2})\.(\d{2})\.(\d{2}|\d{4})$")
+RE_LINE_END_AMOUNT = re.compile(r"([0-9' ]+[.,]\d{2})\s*$")
 
-# ---------------- Hilfsfunktionen ----------------
-
-def extract_text_from_pdf(pdf_path: str) -> str:
-    text = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            text.append(t)
-    return "\n".join(text)
 
+# ---------------- Hilfsfunktionen ----------------
 
 def normalize_date_ddmmyy(date_str: str) -> str:
-    m = re.match(r"(\d{2})\.(\d{2})\.(\d{2}|\d{4})$", date_str.strip())
+    m = RE_DATE_DDMMYY.match(date_str.strip())
     if not m:
         return date_str
     d, mth, y = int(m.group(1)), int(m.group(2)), m.group(3)
@@ -35,19 +37,8 @@ def normalize_date_ddmmyy(date_str: str) -> str:
     return f"{d:02d}.{mth:02d}.{year}"
 
 
-def normalize_amount(amount_str: str) -> float | None:
-    try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
-
-
-def parse_booking_line(line: str, trigger_types: list[str]):
+@functools.lru_cache(maxsize=32)
+def _compile_booking_pattern(trigger_types: tuple[str, ...]) -> re.Pattern:
     escaped = [re.escape(t) for t in trigger_types]
     trigger_words = "(?:" + "|".join(escaped) + ")"
     pattern = rf"""
@@ -56,7 +47,12 @@ def parse_booking_line(line: str, trigger_types: list[str]):
         (?P<date2>\d{{2}}\.\d{{2}}\.(?:\d{{2}}|\d{{4}}))
         \s+(?P<amount>[0-9' ]+[.,]\d{{2}})
     """
-    m = re.search(pattern, line, flags=re.IGNORECASE | re.VERBOSE)
+    return re.compile(pattern, re.IGNORECASE | re.VERBOSE)
+
+
+def parse_booking_line(line: str, trigger_types: list[str]):
+    pat = _compile_booking_pattern(tuple(trigger_types))
+    m = pat.search(line)
     if not m:
         return None, None, None
     date_raw = m.group("date1")
@@ -79,33 +75,48 @@ def scan_payee_bookings(base_dir: str, subfolder: str, payee: str,
 
     payee_lower = payee.lower()
 
-    with csv_path.open("w", newline="", encoding="utf-8") as f:
+    with csv_path.open("w", newline="", encoding="utf-8", buffering=1024 * 1024) as f:
         writer = csv.writer(f, delimiter=";")
         writer.writerow(["Datum", "Betrag_roh", "Betrag_num", "Zeile", "Datei"])
-
-        for pdf_file in sorted(statement_dir.glob("*.pdf")):
+        # Treffer sammeln, am Ende ein writerows() statt writerow() pro Buchung
+        rows = []
+
+        # os.scandir: is_file() ohne extra stat() pro Eintrag
+        with os.scandir(statement_dir) as it:
+            pdf_files = sorted(
+                (Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()),
+                key=lambda p: p.name,
+            )
+
+        prune()  # Cache aufräumen, einmal vor der Schleife
+        for pdf_file in pdf_files:
             print(f"Scanne {pdf_file.name} ...")
             try:
-                text = extract_text_from_pdf(str(pdf_file))
+                text = get_text(pdf_file)
             except Exception as e:
                 print(f"  Fehler beim Lesen von {pdf_file.name}: {e}")
                 continue
 
             lines = text.splitlines()
-            last_date_generic = None
+            # einmal pro PDF vorberechnet statt pro Zeile / pro Treffer
+            stripped = [ln.strip() for ln in lines]
+            lowered = [ln.lower() for ln in stripped]
+
+            # alle Datumsangaben in einem finditer-Durchlauf: (Zeilenindex, letztes Datum der Zeile)
+            line_starts = list(itertools.accumulate((len(ln) + 1 for ln in lines), initial=0))
+            date_lines: list[int] = []
+            date_values: list[str] = []
+            for m in DATE_RE.finditer("\n".join(lines)):
+                li = bisect.bisect_right(line_starts, m.start()) - 1
+                if date_lines and date_lines[-1] == li:
+                    date_values[-1] = m.group(0)
+                else:
+                    date_lines.append(li)
+                    date_values.append(m.group(0))
             hits = 0
 
-            for i, line in enumerate(lines):
-                line_stripped = line.strip()
-                if not line_stripped:
-                    continue
-
-                # letztes Datum merken
-                dates = re.findall(r"\b(\d{2}\.\d{2}\.(\d{2}|\d{4}))\b", line_stripped)
-                if dates:
-                    last_date_generic = normalize_date_ddmmyy(dates[-1][0])
-
-                if payee_lower not in line_stripped.lower():
+            for i, line_stripped in enumerate(stripped):
+                if not line_stripped or payee_lower not in lowered[i]:
                     continue
 
                 datum = None
@@ -113,15 +124,19 @@ def scan_payee_bookings(base_dir: str, subfolder: str, payee: str,
                 amt_num = None
 
                 # Variante A: Betrag am Ende der Zeile
-                m_same = re.search(r"([0-9' ]+[.,]\d{2})\s*$", line_stripped)
+                m_same = RE_LINE_END_AMOUNT.search(line_stripped)
                 if m_same:
                     amt_str = m_same.group(1)
                     amt_num = normalize_amount(amt_str)
-                    datum = last_date_generic
+
+                    # letztes Datum bis und mit dieser Zeile
+                    k = bisect.bisect_right(date_lines, i) - 1
+                    if k >= 0:
+                        datum = normalize_date_ddmmyy(date_values[k])
 
                 # Variante B: Zeile darüber
                 if amt_num is None and i > 0:
-                    prev_line = lines[i - 1].strip()
+                    prev_line = stripped[i - 1]
                     d2, a2_str, a2_num = parse_booking_line(prev_line, trigger_types)
                     if a2_num is not None:
                         datum, amt_str, amt_num = d2, a2_str, a2_num
@@ -129,11 +144,13 @@ def scan_payee_bookings(base_dir: str, subfolder: str, payee: str,
                 if amt_num is None:
                     continue
 
-                writer.writerow([datum or "", amt_str, amt_num, line_stripped, pdf_file.name])
+                rows.append((datum or "", amt_str, amt_num, line_stripped, pdf_file.name))
                 hits += 1
 
             print(f"  Gefundene Buchungen: {hits}")
 
+        writer.writerows(rows)
+
     print(f"CSV gespeichert unter: {csv_path}")
     return csv_path
 
@@ -141,28 +158,36 @@ def scan_payee_bookings(base_dir: str, subfolder: str, payee: str,
 # ---------------- Plot / Report ----------------
 
 def plot_payee_report(csv_path: Path, label: str, outdir: Path):
-    df = pd.read_csv(csv_path, sep=";", encoding="utf-8")
-    df["Datum"] = pd.to_datetime(df["Datum"], dayfirst=True, errors="coerce")
-    df["Betrag_num"] = pd.to_numeric(df["Betrag_num"], errors="coerce")
-    df = df.dropna(subset=["Datum", "Betrag_num"])
-    if df.empty:
+    # CSV direkt mit csv + numpy lesen (ohne pandas-Import)
+    dates = []
+    amounts = []
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter=";"):
+            try:
+                d = datetime.strptime((row["Datum"] or "").strip(), "%d.%m.%Y")
+                a = float(row["Betrag_num"])
+            except (ValueError, TypeError):
+                continue
+            dates.append(d)
+            amounts.append(a)
+    if not dates:
         print("Keine Daten für Plot.")
         return
 
-    df = df.sort_values("Datum")
-    df["Jahr"] = df["Datum"].dt.year
-    df["Monat"] = df["Datum"].dt.month
-    monthly = df.groupby(["Jahr", "Monat"])["Betrag_num"].sum().reset_index()
-    monthly["Monatsdatum"] = pd.to_datetime(
-        dict(year=monthly["Jahr"], month=monthly["Monat"], day=15)
-    )
+    months = np.array(dates, dtype="datetime64[M]")
+    amounts = np.array(amounts, dtype=np.float64)
+    # Monatssummen: np.unique liefert sortierte Monate + Zuordnung pro Buchung
+    month_keys, inverse = np.unique(months, return_inverse=True)
+    monthly_sum = np.bincount(inverse, weights=amounts)
+    # Balken jeweils am 15. des Monats
+    month_mid = month_keys.astype("datetime64[D]") + np.timedelta64(14, "D")
 
-    total = df["Betrag_num"].sum()
-    years = sorted(df["Jahr"].unique())
-    jahr_text = f"{years[0]}–{years[-1]}" if len(years) > 1 else f"{years[0]}"
+    total = amounts.sum()
+    years = month_keys.astype("datetime64[Y]").astype(int) + 1970
+    jahr_text = f"{years[0]}–{years[-1]}" if years[0] != years[-1] else f"{years[0]}"
 
     fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(monthly["Monatsdatum"], monthly["Betrag_num"], width=20)
+    ax.bar(month_mid, monthly_sum, width=20)
     ax.set_ylabel("Betrag [CHF]")
     ax.set_title(f"{label} – Ausgabenanalyse ({jahr_text}), Total: {total:.2f} CHF")
     ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 import argparse
-import pdfplumber
 from pathlib import Path
 
+from pdf_text import iter_page_texts
+
 def pdf_to_text(pdf_path: str, out_path: str | None = None):
     pdf_file = Path(pdf_path)
     if not pdf_file.exists():
@@ -10,10 +11,8 @@ def pdf_to_text(pdf_path: str, out_path: str | None = None):
 
     all_text = []
 
-    with pdfplumber.open(pdf_file) as pdf:
-        for i, page in enumerate(pdf.pages, start=1):
-            txt = page.extract_text() or ""
-            all_text.append(f"===== SEITE {i} =====\n{txt}\n")
+    for i, txt in enumerate(iter_page_texts(pdf_file), start=1):
+        all_text.append(f"===== SEITE {i} =====\n{txt}\n")
 
     full_text = "\n".join(all_text)
 
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+PDF-Text-Extraktion für die v0-Skripte: dieselbe Implementierung wie für
+Provider und Builder (providers/pdf_text.py), Backend-Wahl inklusive.
+"""
+from repo_root import import_shared
+
+_pdf_text = import_shared("pdf_text")
+
+BACKEND = _pdf_text.BACKEND
+extract_text_from_pdf = _pdf_text.extract_text_from_pdf
+iter_page_texts = _pdf_text.iter_page_texts
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Module aus der Repo-Wurzel (zwei Ebenen höher) für die
+v0-Skripte: PDF-Text, Beträge und Datei-Hilfen (providers/) sowie der
+CSV-Cache der Reports (old/) gibt es so nur einmal.
+Die Wurzel wird an sys.path angehängt statt vorangestellt, damit v0-eigene
+Module (settings, config.json) Vorrang behalten.
+"""
+import sys
+from importlib import import_module
+from pathlib import Path
+from types import ModuleType
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def import_shared(name: str, package: str = "providers") -> ModuleType:
+    """<package>.<name> importieren (z.B. "pdf_text" oder "frame_cache" aus "old")."""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.append(str(REPO_ROOT))
+    return import_module(f"{package}.{name}")
@@ -2,10 +2,13 @@
 import os
 import re
 import csv
-import shutil
+import bisect
+import operator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import pdfplumber
+from fileops import move_file
+from text_cache import get_pages_if_first_page, prune
 
 # ==========================
 # KONFIGURATION
@@ -18,10 +21,106 @@ CSV_NAME = "strom.csv"              # CSV mit allen Objekten
 PROVIDER_KEYWORD = "Elektroversorgung"
 
 
+# ==========================
+# Vorkompilierte Regex-Muster
+# ==========================
+
+RE_RECHNUNGSNUMMER = re.compile(r"Rechnungsnummer\s+([\d']+)")
+RE_OBJEKT = re.compile(r"Objekt:\s*(.+)")
+RE_DATE_DDMMYY = re.compile(r"(\d{2})\.(\d{2})\.(\d{2}|\d{4})$")
+
+# Bezugsermittlung (Zeitraum / Zaehlerstaende)
+RE_HT_ENERGIE_STANDS = re.compile(
+    r"Hochtarif Energie\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*kWh"
+)
+RE_NT_ENERGIE_STANDS = re.compile(
+    r"Niedertarif Energie\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*kWh"
+)
+
+# Betragsermittlung (Ansaetze CHF/kWh)
+RE_HT_ENERGIE_ANSATZ = re.compile(r"Hochtarif Energie\s+[\d']+\s*kWh\s+([0-9]+\.\d+)")
+RE_NT_ENERGIE_ANSATZ = re.compile(r"Niedertarif Energie\s+[\d']+\s*kWh\s+([0-9]+\.\d+)")
+RE_HT_NET_ANSATZ = re.compile(r"Hochtarif Netznutzung\s+[\d']+\s*kWh\s+([0-9]+\.\d+)")
+RE_NT_NET_ANSATZ = re.compile(r"Niedertarif Netznutzung\s+[\d']+\s*kWh\s+([0-9]+\.\d+)")
+RE_GRUNDPREIS_LINE = re.compile(r"Grundpreis pro Messstelle.*")
+RE_GRUNDPREIS_NUMS = re.compile(r"[0-9']+\.\d+")
+
+# ... <exkl> <prozentsatz> <inkl> am Zeilenende
+RE_MWST_ROW = re.compile(
+    r"([0-9']+[.,]\d{2})\s+([0-9]{1,2}[.,]\d{1,2})\s+([0-9']+[.,]\d{2})\s*$"
+)
+
+# Abgaben (Ansatz CHF/kWh pro Label) – ein Muster fuer alle Labels
+ABGABE_LABELS = (
+    "Systemdienstleistungen",
+    "Kostendeckende Einspeisevergütung",
+    "Abgabe an die Gemeinde",
+    "Stromreserve",
+)
+RE_ABGABE = re.compile(
+    rf"({'|'.join(ABGABE_LABELS)})\s+[\d']+\s*kWh\s+([0-9]+\.\d+)"
+)
+
+RE_TOTAL_OBJ = re.compile(r"Total Objekt\s+([0-9']+\.\d{2})")
+
+# Spaltenreihenfolge der strom.csv (= Keys von parse_object_page)
+FIELD_ORDER = (
+    "Rechnungsnummer",
+    "Objekt",
+    "Zeitraum_von",
+    "Zeitraum_bis",
+    "MWST_Satz_prozent",
+    "Grundpreis_Messstelle_Ansatz_CHF",
+    "Grundpreis_verrechnet",
+    "Systemdienstleistungen_Ansatz_CHF",
+    "KEV_Ansatz_CHF",
+    "Abgabe_Gemeinde_Ansatz_CHF",
+    "Stromreserve_Ansatz_CHF",
+    "HT_Stand_alt_kWh",
+    "HT_Stand_neu_kWh",
+    "HT_Bezug_kWh",
+    "HT_Energie_Ansatz_CHF_kWh",
+    "HT_Netznutzung_Ansatz_CHF_kWh",
+    "NT_Stand_alt_kWh",
+    "NT_Stand_neu_kWh",
+    "NT_Bezug_kWh",
+    "NT_Energie_Ansatz_CHF_kWh",
+    "NT_Netznutzung_Ansatz_CHF_kWh",
+    "Total_Objekt_CHF",
+    "Datei",
+)
+# dict -> Tuple in FIELD_ORDER (C-Schleife statt DictWriter pro Zeile)
+ROW_VALUES = operator.itemgetter(*FIELD_ORDER)
+
+# Abschnitts-Ueberschriften einer Objektseite (ein Scan statt mehrerer .find)
+RE_ANCHORS = re.compile(r"Bezugsermittlung|Bezug Ansatz|Betragsermittlung|Abgaben|Total Objekt")
+
+
 # ==========================
 # Hilfsfunktionen
 # ==========================
 
+def index_anchors(text: str) -> dict[str, list[int]]:
+    """
+    Sammelt in einem Durchlauf alle Positionen der Abschnitts-Ueberschriften.
+    """
+    anchors: dict[str, list[int]] = {}
+    for m in RE_ANCHORS.finditer(text):
+        anchors.setdefault(m.group(0), []).append(m.start())
+    return anchors
+
+
+def anchor_pos(anchors: dict[str, list[int]], name: str, start: int = 0) -> int:
+    """
+    Wie text.find(name, start), aber auf den vorab gesammelten Positionen.
+    """
+    positions = anchors.get(name)
+    if not positions:
+        return -1
+    i = bisect.bisect_left(positions, start)
+    return positions[i] if i < len(positions) else -1
+
+
 def normalize_number(s: str) -> float | None:
     """
     '1'182' -> 1182.0
@@ -43,7 +142,7 @@ def normalize_date_ddmmyy(date_str: str) -> str:
     01.07.2025 -> 01.07.2025
     """
     date_str = date_str.strip()
-    m = re.match(r"(\d{2})\.(\d{2})\.(\d{2}|\d{4})$", date_str)
+    m = RE_DATE_DDMMYY.match(date_str)
     if not m:
         return date_str
     d, mth, y = m.groups()
@@ -55,8 +154,8 @@ def normalize_date_ddmmyy(date_str: str) -> str:
     return f"{d}.{mth}.{year}"
 
 
-def extract_first(text: str, pattern: str, flags=0) -> str | None:
-    m = re.search(pattern, text, flags)
+def extract_first(text: str, pattern: re.Pattern) -> str | None:
+    m = pattern.search(text)
     return m.group(1) if m else None
 
 def parse_mwst_rate_from_table(energy_net_section: str) -> float | None:
@@ -67,16 +166,13 @@ def parse_mwst_rate_from_table(energy_net_section: str) -> float | None:
     if not energy_net_section:
         return None
 
-    # Regex: ... <exkl> <prozentsatz> <inkl> am Zeilenende
-    pat = re.compile(
-        r"([0-9']+[.,]\d{2})\s+([0-9]{1,2}[.,]\d{1,2})\s+([0-9']+[.,]\d{2})\s*$"
-    )
-
     for raw in energy_net_section.splitlines():
         line = raw.strip()
-        if not line:
+        # Schnelltest vor der Regex: eine MWST-Zeile braucht mind. drei
+        # Dezimalzahlen (>= 13 Zeichen, >= 3 Trennzeichen)
+        if len(line) < 13 or line.count(".") + line.count(",") < 3:
             continue
-        m = pat.search(line)
+        m = RE_MWST_ROW.search(line)
         if not m:
             continue
 
@@ -109,29 +205,25 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
     """
 
     # Objekt-Name
-    objekt = extract_first(text, r"Objekt:\s*(.+)")
+    objekt = extract_first(text, RE_OBJEKT)
     if not objekt:
         return None
 
+    anchors = index_anchors(text)
+
     # ----- Bezugsermittlung: HT/NT Stand + Zeitraum -----
-    bezug_idx = text.find("Bezugsermittlung")
+    bezug_idx = anchor_pos(anchors, "Bezugsermittlung")
     if bezug_idx == -1:
         return None
     # bis zur naechsten Ueberschrift
-    next_idx = text.find("Bezug Ansatz", bezug_idx)
+    next_idx = anchor_pos(anchors, "Bezug Ansatz", bezug_idx)
     if next_idx == -1:
-        next_idx = text.find("Betragsermittlung", bezug_idx)
+        next_idx = anchor_pos(anchors, "Betragsermittlung", bezug_idx)
     bezug_section = text[bezug_idx:next_idx]
 
     # Hochtarif Energie (Zeile mit Datum/Zaehler/Staenden)
-    m_ht = re.search(
-        r"Hochtarif Energie\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*kWh",
-        bezug_section
-    )
-    m_nt = re.search(
-        r"Niedertarif Energie\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*kWh",
-        bezug_section
-    )
+    m_ht = RE_HT_ENERGIE_STANDS.search(bezug_section)
+    m_nt = RE_NT_ENERGIE_STANDS.search(bezug_section)
     zeitraum_von = zeitraum_bis = None
     ht_stand_alt = ht_stand_neu = ht_bezug = None
     nt_stand_alt = nt_stand_neu = nt_bezug = None
@@ -155,9 +247,9 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
         nt_bezug     = normalize_number(m_nt.group(5))
 
     # ----- Betragsermittlung: Energie / Netznutzung / Grundpreis -----
-    betrag_idx = text.find("Betragsermittlung")
+    betrag_idx = anchor_pos(anchors, "Betragsermittlung")
     if betrag_idx != -1:
-        abgaben_idx = text.find("Abgaben", betrag_idx)
+        abgaben_idx = anchor_pos(anchors, "Abgaben", betrag_idx)
         energy_net_section = text[betrag_idx:abgaben_idx if abgaben_idx != -1 else None]
     else:
         energy_net_section = ""
@@ -168,8 +260,8 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
     # Energie: Hochtarif / Niedertarif
     ht_energie_ansatz = None
     nt_energie_ansatz = None
-    m_ht_e = re.search(r"Hochtarif Energie\s+[\d']+\s*kWh\s+([0-9]+\.\d+)", energy_net_section)
-    m_nt_e = re.search(r"Niedertarif Energie\s+[\d']+\s*kWh\s+([0-9]+\.\d+)", energy_net_section)
+    m_ht_e = RE_HT_ENERGIE_ANSATZ.search(energy_net_section)
+    m_nt_e = RE_NT_ENERGIE_ANSATZ.search(energy_net_section)
     if m_ht_e:
         ht_energie_ansatz = normalize_number(m_ht_e.group(1))
     if m_nt_e:
@@ -178,8 +270,8 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
     # Netznutzung: Hochtarif / Niedertarif
     ht_net_ansatz = None
     nt_net_ansatz = None
-    m_ht_n = re.search(r"Hochtarif Netznutzung\s+[\d']+\s*kWh\s+([0-9]+\.\d+)", energy_net_section)
-    m_nt_n = re.search(r"Niedertarif Netznutzung\s+[\d']+\s*kWh\s+([0-9]+\.\d+)", energy_net_section)
+    m_ht_n = RE_HT_NET_ANSATZ.search(energy_net_section)
+    m_nt_n = RE_NT_NET_ANSATZ.search(energy_net_section)
     if m_ht_n:
         ht_net_ansatz = normalize_number(m_ht_n.group(1))
     if m_nt_n:
@@ -189,12 +281,12 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
     grundpreis_ansatz = None
     grundpreis_verrechnet = False
 
-    m_gp_line = re.search(r"Grundpreis pro Messstelle.*", energy_net_section)
+    m_gp_line = RE_GRUNDPREIS_LINE.search(energy_net_section)
     if m_gp_line:
         line = m_gp_line.group(0)
         # alle Dezimalzahlen in der Zeile holen, z.B.:
         # "Grundpreis pro Messstelle 1 10.0000 3 Mt. 30.00 8.10 32.43"
-        nums = re.findall(r"[0-9']+\.\d+", line)
+        nums = RE_GRUNDPREIS_NUMS.findall(line)
         if nums:
             # erste Zahl: Ansatz (10.0000)
             grundpreis_ansatz = normalize_number(nums[0])
@@ -208,18 +300,19 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
                 grundpreis_verrechnet = False
 
     # ----- Abgaben: Systemdienstl. / KEV / Gemeinde / Stromreserve -----
-    abgaben_idx = text.find("Abgaben")
+    abgaben_idx = anchor_pos(anchors, "Abgaben")
     systemdienstl_ansatz = kev_ansatz = abgabe_gem_ansatz = stromreserve_ansatz = None
     if abgaben_idx != -1:
-        total_obj_idx = text.find("Total Objekt", abgaben_idx)
+        total_obj_idx = anchor_pos(anchors, "Total Objekt", abgaben_idx)
         abgaben_section = text[abgaben_idx:total_obj_idx if total_obj_idx != -1 else None]
 
+        # ein Durchlauf ueber den Abschnitt; pro Label zaehlt der erste Treffer
+        abgaben: dict[str, str] = {}
+        for m in RE_ABGABE.finditer(abgaben_section):
+            abgaben.setdefault(m.group(1), m.group(2))
+
         def parse_abgabe(label: str) -> float | None:
-            m = re.search(
-                rf"{label}\s+[\d']+\s*kWh\s+([0-9]+\.\d+)",
-                abgaben_section
-            )
-            return normalize_number(m.group(1)) if m else None
+            return normalize_number(abgaben[label]) if label in abgaben else None
 
         systemdienstl_ansatz = parse_abgabe("Systemdienstleistungen")
         kev_ansatz = parse_abgabe("Kostendeckende Einspeisevergütung")
@@ -228,7 +321,7 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
 
     # ----- Total Objekt -----
     total_obj = None
-    m_tot = re.search(r"Total Objekt\s+([0-9']+\.\d{2})", text)
+    m_tot = RE_TOTAL_OBJ.search(text)
     if m_tot:
         total_obj = normalize_number(m_tot.group(1))
 
@@ -260,6 +353,53 @@ def parse_object_page(text: str, rechnungsnummer: str, filename: str) -> dict |
     return row
 
 
+# ==========================
+# Parsing pro PDF (Worker)
+# ==========================
+
+def is_strom_invoice(first_text: str) -> bool:
+    """Provider-Check auf Seite 1, case-insensitive."""
+    return PROVIDER_KEYWORD.lower() in first_text.lower()
+
+
+def parse_pdf(pdf_path: Path) -> tuple[Path, list[dict], str | None]:
+    """
+    Liest ein PDF und liefert alle erfassten Objekt-Zeilen.
+    Keine Seiteneffekte (kein CSV, kein Verschieben) -> laeuft im Prozess-Pool.
+
+    Rueckgabe: (pdf_path, rows, skip_msg)
+      skip_msg ist None, wenn das PDF verarbeitet wurde,
+      sonst die Meldung, warum es uebersprungen wird.
+    """
+    rows: list[dict] = []
+    try:
+        # Grober Provider-Check auf Seite 1; die restlichen Seiten werden
+        # nur fuer Gemeindewerke-PDFs extrahiert
+        pages = get_pages_if_first_page(pdf_path, is_strom_invoice)
+        if pages is None:
+            return pdf_path, [], "  -> Kein Gemeindewerke-PDF, ueberspringe."
+        first_text = pages[0]
+
+        # Rechnungsnummer extrahieren (falls vorhanden)
+        rechnungsnummer = extract_first(first_text, RE_RECHNUNGSNUMMER)
+        if not rechnungsnummer:
+            rechnungsnummer = ""
+
+        # alle Seiten mit "Objekt:" durchgehen
+        for txt in pages:
+            if "Objekt:" not in txt:
+                continue
+
+            row = parse_object_page(txt, rechnungsnummer, pdf_path.name)
+            if row:
+                rows.append(row)
+
+    except Exception as e:
+        return pdf_path, [], f"Fehler beim Verarbeiten von {pdf_path.name}: {e}"
+
+    return pdf_path, rows, None
+
+
 # ==========================
 # Hauptlogik: scan & move
 # ==========================
@@ -272,80 +412,37 @@ def process_stromrechnungen():
     csv_path = strom_dir / CSV_NAME
     csv_exists = csv_path.exists()
 
-    fieldnames = [
-        "Rechnungsnummer",
-        "Objekt",
-        "Zeitraum_von",
-        "Zeitraum_bis",
-        "MWST_Satz_prozent",
-        "Grundpreis_Messstelle_Ansatz_CHF",
-        "Grundpreis_verrechnet",
-        "Systemdienstleistungen_Ansatz_CHF",
-        "KEV_Ansatz_CHF",
-        "Abgabe_Gemeinde_Ansatz_CHF",
-        "Stromreserve_Ansatz_CHF",
-        "HT_Stand_alt_kWh",
-        "HT_Stand_neu_kWh",
-        "HT_Bezug_kWh",
-        "HT_Energie_Ansatz_CHF_kWh",
-        "HT_Netznutzung_Ansatz_CHF_kWh",
-        "NT_Stand_alt_kWh",
-        "NT_Stand_neu_kWh",
-        "NT_Bezug_kWh",
-        "NT_Energie_Ansatz_CHF_kWh",
-        "NT_Netznutzung_Ansatz_CHF_kWh",
-        "Total_Objekt_CHF",
-        "Datei",
-    ]
-
-    with csv_path.open("a", newline="", encoding="utf-8") as f_csv:
-        writer = csv.DictWriter(f_csv, fieldnames=fieldnames, delimiter=";")
+    with csv_path.open("a", newline="", encoding="utf-8", buffering=1024 * 1024) as f_csv:
+        writer = csv.writer(f_csv, delimiter=";")
         if not csv_exists:
-            writer.writeheader()
-
-        # alle PDFs im Basisordner durchgehen
-        for entry in base.iterdir():
-            if not entry.is_file():
-                continue
-            if not entry.name.lower().endswith(".pdf"):
-                continue
-
-            pdf_path = entry
-            print(f"Pruefe Datei: {pdf_path.name}")  # Debug-Ausgabe
-
-            try:
-                with pdfplumber.open(pdf_path) as pdf:
-                    first_text = (pdf.pages[0].extract_text() or "")
-                    # Grober Provider-Check, case-insensitive
-                    if PROVIDER_KEYWORD.lower() not in first_text.lower():
-                        print("  -> Kein Gemeindewerke-PDF, ueberspringe.")
-                        continue
-
-                    # Rechnungsnummer extrahieren (falls vorhanden)
-                    rechnungsnummer = extract_first(first_text, r"Rechnungsnummer\s+([\d']+)")
-                    if not rechnungsnummer:
-                        rechnungsnummer = ""
-
-                    # alle Seiten mit "Objekt:" durchgehen
-                    for page in pdf.pages:
-                        txt = page.extract_text() or ""
-                        if "Objekt:" not in txt:
-                            continue
-
-                        row = parse_object_page(txt, rechnungsnummer, pdf_path.name)
-                        if row:
-                            writer.writerow(row)
-                            print(f"  -> Objekt erfasst: {row['Objekt']}")
-
-            except Exception as e:
-                print(f"Fehler beim Verarbeiten von {pdf_path.name}: {e}")
-                continue
-
-            # PDF in den Strom-Unterordner verschieben
-            target = strom_dir / pdf_path.name
-            if not target.exists():
-                shutil.move(str(pdf_path), str(target))
-                print(f"  -> Verschoben nach {target}")
+            writer.writerow(FIELD_ORDER)
+
+        # alle PDFs im Basisordner: parsen parallel, schreiben + verschieben seriell
+        # os.scandir: is_file() ohne extra stat() pro Eintrag
+        with os.scandir(base) as it:
+            pdf_files = [
+                Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()
+            ]
+
+        prune()  # Cache aufräumen, einmal vor den Workern
+        with ProcessPoolExecutor() as executor:
+            for pdf_path, rows, skip_msg in executor.map(parse_pdf, pdf_files, chunksize=2):
+                print(f"Pruefe Datei: {pdf_path.name}")  # Debug-Ausgabe
+
+                if skip_msg:
+                    print(skip_msg)
+                    continue
+
+                # alle Objekt-Zeilen des PDFs in einem Aufruf
+                writer.writerows(map(ROW_VALUES, rows))
+                for row in rows:
+                    print(f"  -> Objekt erfasst: {row['Objekt']}")
+
+                # PDF in den Strom-Unterordner verschieben
+                target = strom_dir / pdf_path.name
+                if not target.exists():
+                    move_file(pdf_path, target)
+                    print(f"  -> Verschoben nach {target}")
 
     print(f"Fertig. CSV: {csv_path}")
 
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import re
 import csv
-import shutil
-import pdfplumber
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from settings import BASE_DIR, SWISSCARD_DIR, SWISSCARD_CSV
+from amount import normalize_amount
+from fileops import move_file
+from text_cache import get_text_if_match, prune
+
+# CSV-Zeilen gesammelt schreiben, spaetestens alle N Zeilen
+CSV_FLUSH_ROWS = 50
 
 # Soll die Mindestzahlung statt dem vollen Betrag geloggt werden?
 USE_MINDESTZAHLUNG = False
@@ -16,31 +22,32 @@ SWISSCARD_KEYWORDS = [
     "Cashback Cards",
 ]
 
+# Vorkompilierte Muster
+RE_RECHNUNGSDATUM = re.compile(r"Rechnungsdatum\s+(\d{2}\.\d{2}\.\d{4})")
+RE_DATE = re.compile(r"\b(\d{2}\.\d{2}\.\d{4})\b")
+# 5 CHF-Beträge direkt hintereinander; gesucht wird erst ab 'Mindestzahlung'
+# (str.find + search(pos) statt "Mindestzahlung.*?(...)" mit re.S)
+BETRAEGE_ANCHOR = "Mindestzahlung"
+RE_BETRAEGE_BLOCK = re.compile(r"CHF\s*[0-9' .]+\d{2}(?:\s+CHF\s*[0-9' .]+\d{2}){4}")
+RE_CHF_AMOUNT = re.compile(r"CHF\s*([0-9' .]+\d{2})")
+# irgendeines der SWISSCARD_KEYWORDS, case-insensitive (ohne Kopie per text.upper())
+RE_SWISSCARD_ANY = re.compile("|".join(re.escape(k) for k in SWISSCARD_KEYWORDS), re.IGNORECASE)
+
 
 # -------------------------------------------------------------------
 # Helper
 # -------------------------------------------------------------------
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    text = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            text.append(t)
-    return "\n".join(text)
-
-
 def is_swisscard_invoice(text: str) -> bool:
-    upper = text.upper()
-    return any(k.upper() in upper for k in SWISSCARD_KEYWORDS)
+    return RE_SWISSCARD_ANY.search(text) is not None
 
 
 def find_rechnungsdatum(text: str) -> str | None:
-    m = re.search(r"Rechnungsdatum\s+(\d{2}\.\d{2}\.\d{4})", text)
+    m = RE_RECHNUNGSDATUM.search(text)
     if m:
         return m.group(1)
 
-    m = re.search(r"\b(\d{2}\.\d{2}\.\d{4})\b", text)
+    m = RE_DATE.search(text)
     if m:
         return m.group(1)
 
@@ -52,29 +59,29 @@ def find_betraege_block(text: str) -> list[str] | None:
     Extrahiert die 5 CHF-Betraege nach 'Mindestzahlung':
     [Saldo alt, Ihre Zahlungen, Neue Transaktionen, Neuer Saldo, Mindestzahlung]
     """
-    m = re.search(
-        r"Mindestzahlung.*?(CHF\s*[0-9' .]+\d{2}(?:\s+CHF\s*[0-9' .]+\d{2}){4})",
-        text,
-        re.S,
-    )
+    start = text.find(BETRAEGE_ANCHOR)
+    if start < 0:
+        return None
+
+    m = RE_BETRAEGE_BLOCK.search(text, start + len(BETRAEGE_ANCHOR))
     if not m:
         return None
 
-    line = m.group(1)
-    amounts = re.findall(r"CHF\s*([0-9' .]+\d{2})", line)
+    line = m.group(0)
+    amounts = RE_CHF_AMOUNT.findall(line)
     return amounts if len(amounts) == 5 else None
 
 
-def normalize_amount(amount_str: str) -> float | None:
+def read_pdf(pdf_path: Path) -> tuple[Path, str | None, str | None]:
+    """
+    Worker fuer den Prozess-Pool: PDF -> (Pfad, Text, Fehlermeldung).
+    Nur Text-Extraktion; CSV und Verschieben bleiben im Hauptprozess.
+    Passt weder Seite 1 noch der ganze Text, ist Text None.
+    """
     try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
+        return pdf_path, get_text_if_match(pdf_path, is_swisscard_invoice), None
+    except Exception as e:
+        return pdf_path, None, str(e)
 
 
 # -------------------------------------------------------------------
@@ -85,63 +92,76 @@ def main():
 
     SWISSCARD_DIR.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = list(f for f in BASE_DIR.glob("*.pdf") if f.is_file())
+    # os.scandir: is_file() ohne extra stat() pro Eintrag
+    with os.scandir(BASE_DIR) as it:
+        pdf_files = [
+            Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()
+        ]
 
     recognized = 0
     moved_files = []
 
     csv_exists = SWISSCARD_CSV.exists()
-    with SWISSCARD_CSV.open(mode="a", newline="", encoding="utf-8") as csv_file:
+    with SWISSCARD_CSV.open(mode="a", newline="", encoding="utf-8", buffering=1024 * 1024) as csv_file:
 
         writer = csv.writer(csv_file, delimiter=";")
         if not csv_exists:
             writer.writerow(["Rechnungsdatum", "Betrag_roh", "Betrag_num", "Art", "Datei"])
 
-        for pdf_path in pdf_files:
+        rows = []
+
+        # Text-Extraktion parallel; Parsen, CSV und Verschieben seriell
+        prune()  # Cache aufräumen, einmal vor den Workern
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(read_pdf, pdf_files, chunksize=4)
+
+            for pdf_path, text, error in results:
+                if error is not None:
+                    print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {error}")
+                    continue
 
-            try:
-                text = extract_text_from_pdf(pdf_path)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {e}")
-                continue
+                if text is None:
+                    continue  # Seite 1 passt nicht
 
-            if not is_swisscard_invoice(text):
-                continue
+                recognized += 1
 
-            recognized += 1
+                rechnungsdatum = find_rechnungsdatum(text)
+                betraege = find_betraege_block(text)
 
-            rechnungsdatum = find_rechnungsdatum(text)
-            betraege = find_betraege_block(text)
+                if not betraege:
+                    print(f"[WARNUNG] Betragsblock nicht gefunden in '{pdf_path.name}', übersprungen.")
+                    continue
 
-            if not betraege:
-                print(f"[WARNUNG] Betragsblock nicht gefunden in '{pdf_path.name}', übersprungen.")
-                continue
+                saldo_alt, zahlungen, trans_total, neuer_saldo, mindest = betraege
 
-            saldo_alt, zahlungen, trans_total, neuer_saldo, mindest = betraege
+                if USE_MINDESTZAHLUNG:
+                    betrag_str = mindest
+                    art = "Mindestzahlung"
+                else:
+                    betrag_str = neuer_saldo
+                    art = "Neuer Saldo"
 
-            if USE_MINDESTZAHLUNG:
-                betrag_str = mindest
-                art = "Mindestzahlung"
-            else:
-                betrag_str = neuer_saldo
-                art = "Neuer Saldo"
+                betrag_num = normalize_amount(betrag_str)
 
-            betrag_num = normalize_amount(betrag_str)
+                rows.append([
+                    rechnungsdatum or "",
+                    betrag_str,
+                    betrag_num if betrag_num is not None else "",
+                    art,
+                    pdf_path.name,
+                ])
+                if len(rows) >= CSV_FLUSH_ROWS:
+                    writer.writerows(rows)
+                    rows.clear()
 
-            writer.writerow([
-                rechnungsdatum or "",
-                betrag_str,
-                betrag_num if betrag_num is not None else "",
-                art,
-                pdf_path.name,
-            ])
+                target_path = SWISSCARD_DIR / pdf_path.name
+                try:
+                    move_file(pdf_path, target_path)
+                    moved_files.append(pdf_path.name)
+                except Exception as e:
+                    print(f"[WARNUNG] Fehler beim Verschieben von '{pdf_path.name}': {e}")
 
-            target_path = SWISSCARD_DIR / pdf_path.name
-            try:
-                shutil.move(str(pdf_path), str(target_path))
-                moved_files.append(pdf_path.name)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Verschieben von '{pdf_path.name}': {e}")
+        writer.writerows(rows)
 
     # -------------------------------------------------------------------
     # Zusammenfassung
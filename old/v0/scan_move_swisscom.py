@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import re
 import csv
-import shutil
-import pdfplumber
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from settings import BASE_DIR, SWISSCOM_DIR, SWISSCOM_CSV
+from amount import normalize_amount
+from fileops import move_file
+from text_cache import get_text_if_match, prune
+
+# CSV-Zeilen gesammelt schreiben, spaetestens alle N Zeilen
+CSV_FLUSH_ROWS = 50
 
 SWISSCOM_KEYWORDS = [
     "Swisscom (Schweiz) AG",
@@ -13,39 +19,38 @@ SWISSCOM_KEYWORDS = [
     "Rechnungsbetrag inkl. MWST",
 ]
 
-
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    text = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            text.append(t)
-    return "\n".join(text)
+MONTHS = {
+    "JANUAR": 1,
+    "FEBRUAR": 2,
+    "MAERZ": 3,
+    "MÄRZ": 3,
+    "APRIL": 4,
+    "MAI": 5,
+    "JUNI": 6,
+    "JULI": 7,
+    "AUGUST": 8,
+    "SEPTEMBER": 9,
+    "OKTOBER": 10,
+    "NOVEMBER": 11,
+    "DEZEMBER": 12,
+}
+
+# Vorkompilierte Muster
+RE_GERMAN_DATE = re.compile(r"\s*(\d{1,2})\.\s+([A-Za-zÄÖÜäöü]+)\s+(\d{4})\s*$")
+RE_DATUM = re.compile(r"Datum[: ]+(\d{1,2}\.\s+[A-Za-zÄÖÜäöü]+\s+\d{4})")
+RE_AMOUNT_TOTAL = re.compile(r"Rechnungstotal in CHF inkl\. MWST\s+([0-9' ]+\.\d{2})")
+RE_AMOUNT_EBILL = re.compile(r"Rechnungsbetrag\s+inkl\. MWST\s+CHF\s+([0-9' ]+\.\d{2})", re.S)
+RE_AMOUNT_FALLBACK = re.compile(r"Währung\s+CHF\s+Betrag\s+([0-9' ]+\.\d{2})", re.S)
+# irgendeines der SWISSCOM_KEYWORDS, case-insensitive (ohne Kopie per text.upper())
+RE_SWISSCOM_ANY = re.compile("|".join(re.escape(k) for k in SWISSCOM_KEYWORDS), re.IGNORECASE)
 
 
 def is_swisscom_invoice(text: str) -> bool:
-    upper = text.upper()
-    return any(k.upper() in upper for k in SWISSCOM_KEYWORDS)
+    return RE_SWISSCOM_ANY.search(text) is not None
 
 
 def parse_german_date(date_str: str) -> str | None:
-    MONTHS = {
-        "JANUAR": 1,
-        "FEBRUAR": 2,
-        "MAERZ": 3,
-        "MÄRZ": 3,
-        "APRIL": 4,
-        "MAI": 5,
-        "JUNI": 6,
-        "JULI": 7,
-        "AUGUST": 8,
-        "SEPTEMBER": 9,
-        "OKTOBER": 10,
-        "NOVEMBER": 11,
-        "DEZEMBER": 12,
-    }
-
-    m = re.match(r"\s*(\d{1,2})\.\s+([A-Za-zÄÖÜäöü]+)\s+(\d{4})\s*$", date_str)
+    m = RE_GERMAN_DATE.match(date_str)
     if not m:
         return None
 
@@ -61,91 +66,102 @@ def parse_german_date(date_str: str) -> str | None:
 
 
 def find_datum(text: str) -> str | None:
-    m = re.search(r"Datum[: ]+(\d{1,2}\.\s+[A-Za-zÄÖÜäöü]+\s+\d{4})", text)
+    m = RE_DATUM.search(text)
     if not m:
         return None
     return parse_german_date(m.group(1))
 
 
 def find_amount(text: str) -> str | None:
-    m = re.search(r"Rechnungstotal in CHF inkl\. MWST\s+([0-9' ]+\.\d{2})", text)
+    m = RE_AMOUNT_TOTAL.search(text)
     if m:
         return m.group(1).strip()
 
-    m = re.search(
-        r"Rechnungsbetrag\s+inkl\. MWST\s+CHF\s+([0-9' ]+\.\d{2})",
-        text,
-        re.S,
-    )
+    m = RE_AMOUNT_EBILL.search(text)
     if m:
         return m.group(1).strip()
 
-    m = re.search(r"Währung\s+CHF\s+Betrag\s+([0-9' ]+\.\d{2})", text, re.S)
+    m = RE_AMOUNT_FALLBACK.search(text)
     if m:
         return m.group(1).strip()
 
     return None
 
 
-def normalize_amount_for_number(amount_str: str) -> float | None:
+def read_pdf(pdf_path: Path) -> tuple[Path, str | None, str | None]:
+    """
+    Worker fuer den Prozess-Pool: PDF -> (Pfad, Text, Fehlermeldung).
+    Nur Text-Extraktion; CSV und Verschieben bleiben im Hauptprozess.
+    Passt weder Seite 1 noch der ganze Text, ist Text None.
+    """
     try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
+        return pdf_path, get_text_if_match(pdf_path, is_swisscom_invoice), None
+    except Exception as e:
+        return pdf_path, None, str(e)
+
 
 def main():
     SWISSCOM_DIR.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = list(BASE_DIR.glob("*.pdf"))
+    # os.scandir: is_file() ohne extra stat() pro Eintrag
+    with os.scandir(BASE_DIR) as it:
+        pdf_files = [
+            Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()
+        ]
 
     recognized = 0
     moved_files = []
 
     csv_exists = SWISSCOM_CSV.exists()
-    with SWISSCOM_CSV.open(mode="a", newline="", encoding="utf-8") as csv_file:
+    with SWISSCOM_CSV.open(mode="a", newline="", encoding="utf-8", buffering=1024 * 1024) as csv_file:
         writer = csv.writer(csv_file, delimiter=";")
         if not csv_exists:
             writer.writerow(["Rechnungsdatum", "Betrag_roh", "Betrag_num", "Datei"])
 
-        for pdf_path in pdf_files:
-            try:
-                text = extract_text_from_pdf(pdf_path)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Lesen von: {pdf_path.name}: {e}")
-                continue
-
-            if not is_swisscom_invoice(text):
-                continue  # keine Konsole, einfach überspringen
-
-            recognized += 1
-
-            date_str = find_datum(text)
-            amount_str = find_amount(text)
-            if not amount_str:
-                print(f"[WARNUNG] Betrag fehlt in {pdf_path.name}, überspringe.")
-                continue
-
-            amount_num = normalize_amount_for_number(amount_str)
-
-            writer.writerow([
-                date_str or "",
-                amount_str,
-                amount_num if amount_num is not None else "",
-                pdf_path.name,
-            ])
-
-            # Datei verschieben
-            target_path = SWISSCOM_DIR / pdf_path.name
-            try:
-                shutil.move(str(pdf_path), str(target_path))
-                moved_files.append(pdf_path.name)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Verschieben von {pdf_path.name}: {e}")
+        rows = []
+
+        # Text-Extraktion parallel; Parsen, CSV und Verschieben seriell
+        prune()  # Cache aufräumen, einmal vor den Workern
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(read_pdf, pdf_files, chunksize=4)
+
+            for pdf_path, text, error in results:
+                if error is not None:
+                    print(f"[WARNUNG] Fehler beim Lesen von: {pdf_path.name}: {error}")
+                    continue
+
+                if text is None:
+                    continue  # Seite 1 passt nicht
+
+                recognized += 1
+
+                date_str = find_datum(text)
+                amount_str = find_amount(text)
+                if not amount_str:
+                    print(f"[WARNUNG] Betrag fehlt in {pdf_path.name}, überspringe.")
+                    continue
+
+                amount_num = normalize_amount(amount_str)
+
+                rows.append([
+                    date_str or "",
+                    amount_str,
+                    amount_num if amount_num is not None else "",
+                    pdf_path.name,
+                ])
+                if len(rows) >= CSV_FLUSH_ROWS:
+                    writer.writerows(rows)
+                    rows.clear()
+
+                # Datei verschieben
+                target_path = SWISSCOM_DIR / pdf_path.name
+                try:
+                    move_file(pdf_path, target_path)
+                    moved_files.append(pdf_path.name)
+                except Exception as e:
+                    print(f"[WARNUNG] Fehler beim Verschieben von {pdf_path.name}: {e}")
+
+        writer.writerows(rows)
 
     # ----------------------------------------------------------
     # Zusammenfassung
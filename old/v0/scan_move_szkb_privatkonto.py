@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 import re
 import csv
-import shutil
-import pdfplumber
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from settings import BASE_DIR, SZKB_DIR, SZKB_CSV
+from amount import normalize_amount
+from fileops import move_file
+from text_cache import get_text_if_match, prune
+
+# CSV-Zeilen gesammelt schreiben, spaetestens alle N Zeilen
+CSV_FLUSH_ROWS = 50
 
 # Keywords zur Erkennung von Kontoauszügen
 STATEMENT_KEYWORDS = [
@@ -19,74 +25,78 @@ SALDO_KEYWORDS = [
     "Schlusssaldo",
 ]
 
+# Vorkompilierte Muster
+RE_DATE_ANY = re.compile(r"\b(\d{2})\.(\d{2})\.(\d{4})\b")
+RE_SALDO_LINE = re.compile(r"(Saldo.*)", re.IGNORECASE)
+RE_SALDO_AMOUNT = re.compile(r"([+-]?\s*CHF\s*)?([+-]?[0-9' ]+\.\d{2})")
+# ganze Zeile mit einem der SALDO_KEYWORDS (statt splitlines + upper pro Zeile)
+RE_SALDO_KEYWORD_LINE = re.compile(
+    r"^.*(?:" + "|".join(re.escape(k) for k in SALDO_KEYWORDS) + r").*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# irgendeines der STATEMENT_KEYWORDS, case-insensitive (ohne Kopie per text.upper())
+RE_STATEMENT_ANY = re.compile("|".join(re.escape(k) for k in STATEMENT_KEYWORDS), re.IGNORECASE)
+
 
 # -------------------------------------------------------------
 # Helper
 # -------------------------------------------------------------
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    text = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            text.append(t)
-    return "\n".join(text)
-
-
 def is_statement(text: str) -> bool:
-    upper = text.upper()
-    return any(k.upper() in upper for k in STATEMENT_KEYWORDS)
-
-
-def find_all_dates(text: str) -> list[str]:
-    """Findet alle Datumsangaben im Format TT.MM.JJJJ."""
-    return re.findall(r"\b(\d{2}\.\d{2}\.\d{4})\b", text)
+    return RE_STATEMENT_ANY.search(text) is not None
 
 
-def find_period_from_dates(dates: list[str]) -> tuple[str | None, str | None]:
-    """Ermittelt den Zeitraum (von, bis)."""
-    if not dates:
-        return None, None
-    dates_sorted = sorted(dates)
-    return dates_sorted[0], dates_sorted[-1]
+def find_period(text: str) -> tuple[str | None, str | None]:
+    """
+    Ermittelt den Zeitraum (von, bis) als frühestes / spätestes Datum TT.MM.JJJJ.
+    Ein Durchlauf mit min/max über den Schlüssel JJJJMMTT, ohne Liste + sort
+    (TT.MM.JJJJ direkt sortiert stimmt über Monats-/Jahresgrenzen nicht).
+    """
+    lo = hi = None
+    von = bis = None
+    for m in RE_DATE_ANY.finditer(text):
+        key = m.group(3) + m.group(2) + m.group(1)
+        if lo is None or key < lo:
+            lo, von = key, m.group(0)
+        if hi is None or key > hi:
+            hi, bis = key, m.group(0)
+    return von, bis
 
 
 def find_saldo(text: str) -> str | None:
     """
     Sucht den Schlusssaldo in Zeilen mit 'Saldo...'.
     """
-    lines = []
-    for line in text.splitlines():
-        if any(k.upper() in line.upper() for k in SALDO_KEYWORDS):
-            lines.append(line)
-
-    # Fallback: breit im Text suchen
-    if not lines:
-        fallback = re.findall(r"(Saldo.*)", text, flags=re.IGNORECASE)
-        lines.extend(fallback)
-
-    if not lines:
+    # letzte Zeile mit einem der SALDO_KEYWORDS, case-insensitiv
+    last = None
+    for last in RE_SALDO_KEYWORD_LINE.finditer(text):
+        pass
+    if last is None:
+        # Fallback: irgendwo im Text nach 'Saldo' suchen
+        for last in RE_SALDO_LINE.finditer(text):
+            pass
+    if last is None:
         return None
+    line = last.group(0)
 
-    last_line = lines[-1]
-
-    m = re.search(r"([+-]?\s*CHF\s*)?([+-]?[0-9' ]+\.\d{2})", last_line)
+    # Betrag herausparsen (CHF optional, Vorzeichen optional)
+    m = RE_SALDO_AMOUNT.search(line)
     if not m:
         return None
 
     return m.group(2).strip()
 
 
-def normalize_amount(amount_str: str) -> float | None:
+def read_pdf(pdf_path: Path) -> tuple[Path, str | None, str | None]:
+    """
+    Worker fuer den Prozess-Pool: PDF -> (Pfad, Text, Fehlermeldung).
+    Nur Text-Extraktion; CSV und Verschieben bleiben im Hauptprozess.
+    Passt weder Seite 1 noch der ganze Text, ist Text None.
+    """
     try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
+        return pdf_path, get_text_if_match(pdf_path, is_statement), None
+    except Exception as e:
+        return pdf_path, None, str(e)
 
 
 # -------------------------------------------------------------
@@ -98,13 +108,17 @@ def main():
     SZKB_DIR.mkdir(parents=True, exist_ok=True)
 
     # Nur PDFs direkt im BASE_DIR
-    pdf_files = list(f for f in BASE_DIR.glob("*.pdf") if f.is_file())
+    # os.scandir: is_file() ohne extra stat() pro Eintrag
+    with os.scandir(BASE_DIR) as it:
+        pdf_files = [
+            Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()
+        ]
 
     recognized = 0
     moved_files = []
 
     csv_exists = SZKB_CSV.exists()
-    with SZKB_CSV.open(mode="a", newline="", encoding="utf-8") as csv_file:
+    with SZKB_CSV.open(mode="a", newline="", encoding="utf-8", buffering=1024 * 1024) as csv_file:
 
         writer = csv.writer(csv_file, delimiter=";")
         if not csv_exists:
@@ -116,47 +130,55 @@ def main():
                 "Datei",
             ])
 
-        for pdf_path in pdf_files:
-
-            try:
-                text = extract_text_from_pdf(pdf_path)
-            except Exception as e:
-                print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {e}")
-                continue
-
-            if not is_statement(text):
-                continue
-
-            recognized += 1
-
-            # Zeitraum bestimmen
-            dates = find_all_dates(text)
-            von, bis = find_period_from_dates(dates)
-
-            # Saldo extrahieren
-            saldo_str = find_saldo(text)
-            if saldo_str:
-                saldo_num = normalize_amount(saldo_str)
-            else:
-                saldo_num = None
-                print(f"[WARNUNG] Kein Schlusssaldo in '{pdf_path.name}' gefunden.")
-
-            # In CSV
-            writer.writerow([
-                von or "",
-                bis or "",
-                saldo_str or "",
-                saldo_num if saldo_num is not None else "",
-                pdf_path.name,
-            ])
-
-            # Datei verschieben
-            target_path = SZKB_DIR / pdf_path.name
-            try:
-                shutil.move(str(pdf_path), str(target_path))
-                moved_files.append(pdf_path.name)
-            except Exception as e:
-                print(f"[WARNUNG] Verschieben fehlgeschlagen für '{pdf_path.name}': {e}")
+        rows = []
+
+        # Text-Extraktion parallel; Parsen, CSV und Verschieben seriell
+        prune()  # Cache aufräumen, einmal vor den Workern
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(read_pdf, pdf_files, chunksize=4)
+
+            for pdf_path, text, error in results:
+                if error is not None:
+                    print(f"[WARNUNG] Fehler beim Lesen von '{pdf_path.name}': {error}")
+                    continue
+
+                if text is None:
+                    continue  # Seite 1 passt nicht
+
+                recognized += 1
+
+                # Zeitraum bestimmen
+                von, bis = find_period(text)
+
+                # Saldo extrahieren
+                saldo_str = find_saldo(text)
+                if saldo_str:
+                    saldo_num = normalize_amount(saldo_str)
+                else:
+                    saldo_num = None
+                    print(f"[WARNUNG] Kein Schlusssaldo in '{pdf_path.name}' gefunden.")
+
+                # In CSV
+                rows.append([
+                    von or "",
+                    bis or "",
+                    saldo_str or "",
+                    saldo_num if saldo_num is not None else "",
+                    pdf_path.name,
+                ])
+                if len(rows) >= CSV_FLUSH_ROWS:
+                    writer.writerows(rows)
+                    rows.clear()
+
+                # Datei verschieben
+                target_path = SZKB_DIR / pdf_path.name
+                try:
+                    move_file(pdf_path, target_path)
+                    moved_files.append(pdf_path.name)
+                except Exception as e:
+                    print(f"[WARNUNG] Verschieben fehlgeschlagen für '{pdf_path.name}': {e}")
+
+        writer.writerows(rows)
 
     # -------------------------------------------------------------
     # Zusammenfassung
@@ -32,13 +32,15 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 # ---------------------------------------------------------
 # 3. Basis-Ordner für alle Rechnungen
 # ---------------------------------------------------------
-BASE_DIR = Path(cfg["BASE_DIR"]).expanduser().resolve()
+# absolute() statt resolve(): reine Pfad-Operation, kein Auflösen von
+# Symlinks/Junctions über das Dateisystem (auf OneDrive-Pfaden spürbar)
+BASE_DIR = Path(cfg["BASE_DIR"]).expanduser().absolute()
 
 
 # ---------------------------------------------------------
 # 4. Python-Interpreter aus config.json
 # ---------------------------------------------------------
-PYTHON_EXE = Path(cfg.get("PYTHON_EXE", sys.executable)).resolve()
+PYTHON_EXE = Path(cfg.get("PYTHON_EXE", sys.executable)).expanduser().absolute()
 
 
 # ---------------------------------------------------------
@@ -60,8 +62,10 @@ STROM_VERIFIED_CSV = STROM_DIR / "strom_verified.csv"
 
 
 # Ordner automatisch erstellen, wenn sie fehlen
+# (Normalfall: alle vorhanden -> nur ein stat() pro Ordner)
 for p in [BASE_DIR, SWISSCOM_DIR, SWISSCARD_DIR, SZKB_DIR, STROM_DIR]:
-    p.mkdir(parents=True, exist_ok=True)
+    if not p.is_dir():
+        p.mkdir(parents=True, exist_ok=True)
 
 
 # ---------------------------------------------------------
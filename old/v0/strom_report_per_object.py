@@ -2,92 +2,123 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import math
-from datetime import datetime
 
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # nur PDFs schreiben, kein GUI-Backend (vor pyplot setzen)
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 
-
-def num(x):
-    if x is None or (isinstance(x, float) and math.isnan(x)):
-        return 0.0
-    s = str(x).strip().replace("\u00A0", "").replace("'", "").replace(" ", "").replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
-
-def to_date(s):
-    if pd.isna(s):
-        return None
-    for fmt in ("%d.%m.%Y", "%d.%m.%y"):
-        try:
-            return datetime.strptime(str(s), fmt)
-        except ValueError:
-            continue
-    return None
+# Spalten, die der Report braucht (strom.csv oder strom_verified.csv);
+# alle übrigen (Zählerstände, Datei, Rechenschritte) liest read_csv gar nicht
+REPORT_COLUMNS = {
+    "Objekt", "Zeitraum_von", "Zeitraum_bis",
+    "HT_Bezug_kWh", "NT_Bezug_kWh", "NT_Bezug_KWh",
+    "HT_Energie_Ansatz_CHF_kWh", "NT_Energie_Ansatz_CHF_kWh",
+    "HT_Netznutzung_Ansatz_CHF_kWh", "NT_Netznutzung_Ansatz_CHF_kWh",
+    "Systemdienstleistungen_Ansatz_CHF", "KEV_Ansatz_CHF",
+    "Abgabe_Gemeinde_Ansatz_CHF", "Stromreserve_Ansatz_CHF",
+    "Exkl_Energie_CHF", "Exkl_Netznutzung_CHF", "Exkl_Abgaben_CHF",
+    "Total_Objekt_CHF", "Recalc_Total_Inkl_CHF", "MWST_Satz_prozent",
+}
+# wenige Objekte, viele Zeilen: Kategorie -> Filter + groupby über Codes
+REPORT_DTYPES = {"Objekt": "category", "Zeitraum_von": str, "Zeitraum_bis": str}
+
+# Dateiname: jedes Zeichen, das nicht isalnum() ist -> "_" (Umlaute bleiben)
+RE_UNSAFE_CHAR = re.compile(r"[\W_]")
+
+
+def vec_num(s):
+    """
+    Spalte robust nach float wandeln (erlaubt 1'234.56, 1 234,56 etc.):
+    ein vektorisierter Durchlauf (str.replace + to_numeric) statt eines
+    Python-Aufrufs pro Zelle. Leere/unlesbare Werte -> 0.0.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64").fillna(0.0)
+    t = s.astype(str).str.strip().str.replace(r"[\u00A0' ]", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(t, errors="coerce").fillna(0.0)
+
+
+def col_num(df, col):
+    """Spalte col als float (vec_num), 0.0 wenn die Spalte fehlt."""
+    if col not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return vec_num(df[col])
+
+
+def parse_dates(s):
+    """
+    Spalte TT.MM.JJJJ oder TT.MM.JJ -> datetime64 (NaT, wenn keines passt).
+    Zwei vektorisierte to_datetime-Durchläufe mit festem Format statt
+    strptime pro Zelle.
+    """
+    s = s.astype("string").str.strip()
+    # cache=True: jedes unterschiedliche Datum nur einmal parsen (Perioden-
+    # grenzen wie 01.01./01.04. wiederholen sich über alle Objekte)
+    d = pd.to_datetime(s, format="%d.%m.%Y", errors="coerce", cache=True)
+    return d.fillna(pd.to_datetime(s, format="%d.%m.%y", errors="coerce", cache=True))
 
 
 def ensure_dates(df):
     # Preferiere Zeitraum_bis als X-Achse; fallback: Zeitraum_von
-    df = df.copy()
-    df["Date_X"] = df["Zeitraum_bis"].apply(to_date)
+    # (ergänzt Date_X direkt in df; zurück kommt ein neuer, sortierter Frame)
+    df["Date_X"] = parse_dates(df["Zeitraum_bis"])
     missing = df["Date_X"].isna()
     if missing.any():
-        df.loc[missing, "Date_X"] = df.loc[missing, "Zeitraum_von"].apply(to_date)
+        df.loc[missing, "Date_X"] = parse_dates(df.loc[missing, "Zeitraum_von"])
     return df.dropna(subset=["Date_X"]).sort_values("Date_X")
 
 
 def add_computed_columns(df):
-    df = df.copy()
+    # ergänzt die Spalten direkt in df (keine Kopie des ganzen Frames)
 
     # Verbrauch
-    df["HT_kWh"] = df.get("HT_Bezug_kWh", 0).apply(num)
+    df["HT_kWh"] = col_num(df, "HT_Bezug_kWh")
     # toleranter Spaltenname für NT
-    df["NT_kWh"] = (df["NT_Bezug_kWh"] if "NT_Bezug_kWh" in df.columns else df.get("NT_Bezug_KWh", 0)).apply(num)
+    df["NT_kWh"] = col_num(df, "NT_Bezug_kWh" if "NT_Bezug_kWh" in df.columns else "NT_Bezug_KWh")
     df["TOT_kWh"] = df["HT_kWh"] + df["NT_kWh"]
 
     # Sätze (CHF/kWh)
-    df["HT_Energie_Satz"] = df.get("HT_Energie_Ansatz_CHF_kWh", 0).apply(num)
-    df["NT_Energie_Satz"] = df.get("NT_Energie_Ansatz_CHF_kWh", 0).apply(num)
-    df["HT_Netz_Satz"]    = df.get("HT_Netznutzung_Ansatz_CHF_kWh", 0).apply(num)
-    df["NT_Netz_Satz"]    = df.get("NT_Netznutzung_Ansatz_CHF_kWh", 0).apply(num)
+    df["HT_Energie_Satz"] = col_num(df, "HT_Energie_Ansatz_CHF_kWh")
+    df["NT_Energie_Satz"] = col_num(df, "NT_Energie_Ansatz_CHF_kWh")
+    df["HT_Netz_Satz"]    = col_num(df, "HT_Netznutzung_Ansatz_CHF_kWh")
+    df["NT_Netz_Satz"]    = col_num(df, "NT_Netznutzung_Ansatz_CHF_kWh")
 
     # Abgaben-Satz (Summe, CHF/kWh)
     df["Abgaben_Satz"] = (
-        df.get("Systemdienstleistungen_Ansatz_CHF", 0).apply(num)
-        + df.get("KEV_Ansatz_CHF", 0).apply(num)
-        + df.get("Abgabe_Gemeinde_Ansatz_CHF", 0).apply(num)
-        + df.get("Stromreserve_Ansatz_CHF", 0).apply(num)
+        col_num(df, "Systemdienstleistungen_Ansatz_CHF")
+        + col_num(df, "KEV_Ansatz_CHF")
+        + col_num(df, "Abgabe_Gemeinde_Ansatz_CHF")
+        + col_num(df, "Stromreserve_Ansatz_CHF")
     )
 
     # Kosten (exkl. MWST) – aus strom_verified.csv nehmen, falls vorhanden; sonst selbst berechnen
     if {"Exkl_Energie_CHF", "Exkl_Netznutzung_CHF", "Exkl_Abgaben_CHF"}.issubset(df.columns):
-        df["Kosten_Energie"]     = df["Exkl_Energie_CHF"].apply(num)
-        df["Kosten_Netznutzung"] = df["Exkl_Netznutzung_CHF"].apply(num)
-        df["Kosten_Abgaben"]     = df["Exkl_Abgaben_CHF"].apply(num)
+        df["Kosten_Energie"]     = vec_num(df["Exkl_Energie_CHF"])
+        df["Kosten_Netznutzung"] = vec_num(df["Exkl_Netznutzung_CHF"])
+        df["Kosten_Abgaben"]     = vec_num(df["Exkl_Abgaben_CHF"])
     else:
         df["Kosten_Energie"]     = df["HT_kWh"] * df["HT_Energie_Satz"] + df["NT_kWh"] * df["NT_Energie_Satz"]
         df["Kosten_Netznutzung"] = df["HT_kWh"] * df["HT_Netz_Satz"]    + df["NT_kWh"] * df["NT_Netz_Satz"]
         df["Kosten_Abgaben"]     = (df["HT_kWh"] + df["NT_kWh"]) * df["Abgaben_Satz"]
 
+    # MWST-Satz
+    df["MWST_%"] = col_num(df, "MWST_Satz_prozent")
+
     # Total inkl. MWST – nimm den Rechnungswert, wenn vorhanden (robuster)
     if "Total_Objekt_CHF" in df.columns:
-        df["Kosten_Total_inkl"] = df["Total_Objekt_CHF"].apply(num)
+        df["Kosten_Total_inkl"] = vec_num(df["Total_Objekt_CHF"])
     elif "Recalc_Total_Inkl_CHF" in df.columns:
-        df["Kosten_Total_inkl"] = df["Recalc_Total_Inkl_CHF"].apply(num)
+        df["Kosten_Total_inkl"] = vec_num(df["Recalc_Total_Inkl_CHF"])
     else:
         # Fallback: exkl + MWST
-        mwst_rate = df.get("MWST_Satz_prozent", 0).apply(num) / 100.0
         exkl_sum = df["Kosten_Energie"] + df["Kosten_Netznutzung"] + df["Kosten_Abgaben"]
-        df["Kosten_Total_inkl"] = exkl_sum * (1.0 + mwst_rate)
-
-    # MWST-Satz
-    df["MWST_%"] = df.get("MWST_Satz_prozent", 0).apply(num)
+        df["Kosten_Total_inkl"] = exkl_sum * (1.0 + df["MWST_%"] / 100.0)
 
     return df
 
@@ -115,27 +146,27 @@ def plot_costs(ax, df, obj_label):
     ax.tick_params(axis="x", rotation=45)
 
 
-def _rel_change(series):
-    s0 = series.iloc[0] if len(series) else 0.0
-    if s0 == 0:
-        return pd.Series([0.0]*len(series), index=series.index)
-    return (series / s0 - 1.0) * 100.0
+# Satz-Spalte -> Legende in plot_rates
+RATE_LABELS = {
+    "HT_Energie_Satz": "HT Energie-Satz Δ%",
+    "NT_Energie_Satz": "NT Energie-Satz Δ%",
+    "HT_Netz_Satz":    "HT Netznutzung-Satz Δ%",
+    "NT_Netz_Satz":    "NT Netznutzung-Satz Δ%",
+    "Abgaben_Satz":    "Abgaben-Satz Δ%",
+}
 
 
 def plot_rates(ax, df, obj_label):
     # MWST-Satz direkt (in %)
     ax.plot(df["Date_X"], df["MWST_%"], marker="o", label="MWST-Satz [%]")
 
-    # Relative Änderung (in %) der CHF/kWh-Sätze ggü. erster Periode
-    for col, label in [
-        ("HT_Energie_Satz", "HT Energie-Satz Δ%"),
-        ("NT_Energie_Satz", "NT Energie-Satz Δ%"),
-        ("HT_Netz_Satz",    "HT Netznutzung-Satz Δ%"),
-        ("NT_Netz_Satz",    "NT Netznutzung-Satz Δ%"),
-        ("Abgaben_Satz",    "Abgaben-Satz Δ%"),
-    ]:
-        rel = _rel_change(df[col])
-        ax.plot(df["Date_X"], rel, marker="o", label=label)
+    # Relative Änderung (in %) der CHF/kWh-Sätze ggü. erster Periode,
+    # für alle Sätze in einer Operation (Satz 0 in der ersten Periode -> 0 %)
+    rates = df[list(RATE_LABELS)]
+    base = rates.iloc[0]
+    rel = (rates / base.where(base != 0) - 1.0).mul(100.0).fillna(0.0)
+    for col, label in RATE_LABELS.items():
+        ax.plot(df["Date_X"], rel[col], marker="o", label=label)
 
     ax.set_title(f"{obj_label} – Veränderung der Sätze")
     ax.set_ylabel("%")
@@ -144,29 +175,41 @@ def plot_rates(ax, df, obj_label):
     ax.tick_params(axis="x", rotation=45)
 
 
-def make_report_for_object(df_obj, out_pdf_path, obj_label):
-    # Drei getrennte Figuren (je eine Seite) – keine Subplots in einer Figure
+def make_report_for_object(df_obj, out_pdf_path, obj_label, fig, ax):
+    # Drei Seiten (Verbrauch, Kosten, Sätze) – keine Subplots in einer Figure.
+    # Alle Seiten aller Objekte nutzen dieselbe Figure: ax.clear() statt
+    # pro Seite eine neue Figure samt Canvas aufzubauen. Die Ränder sind in
+    # report_figure() fest gesetzt (kein tight_layout pro Seite).
     with PdfPages(out_pdf_path) as pdf:
-        # 1) Verbrauch
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        plot_consumption(ax1, df_obj, obj_label)
-        fig1.tight_layout()
-        pdf.savefig(fig1)
-        plt.close(fig1)
-
-        # 2) Kosten
-        fig2, ax2 = plt.subplots(figsize=(10, 6))
-        plot_costs(ax2, df_obj, obj_label)
-        fig2.tight_layout()
-        pdf.savefig(fig2)
-        plt.close(fig2)
-
-        # 3) Sätze
-        fig3, ax3 = plt.subplots(figsize=(10, 6))
-        plot_rates(ax3, df_obj, obj_label)
-        fig3.tight_layout()
-        pdf.savefig(fig3)
-        plt.close(fig3)
+        for plot in (plot_consumption, plot_costs, plot_rates):
+            ax.clear()
+            plot(ax, df_obj, obj_label)
+            pdf.savefig(fig)
+
+
+# eine Figure pro Prozess (jeder Worker im Prozess-Pool baut seine eigene)
+_fig_ax = None
+
+
+def report_figure():
+    global _fig_ax
+    if _fig_ax is None:
+        fig, ax = plt.subplots(figsize=(10, 6))
+        # feste Ränder statt tight_layout pro Seite (ax.clear() lässt sie stehen):
+        # Platz für die Achsenbeschriftung links und die gedrehten Daten unten
+        fig.subplots_adjust(left=0.09, right=0.98, bottom=0.14, top=0.93)
+        _fig_ax = (fig, ax)
+    return _fig_ax
+
+
+def render_report(job):
+    """
+    Worker für den Prozess-Pool (top-level, damit picklebar):
+    (Objekt, Zeilen des Objekts, Ziel-PDF) -> Ziel-PDF.
+    """
+    obj, df_obj, out_pdf = job
+    make_report_for_object(df_obj, out_pdf, obj, *report_figure())
+    return out_pdf
 
 
 def main():
@@ -181,31 +224,53 @@ def main():
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(csv_path, sep=args.sep, encoding="utf-8")
+    df = pd.read_csv(
+        csv_path,
+        sep=args.sep,
+        encoding="utf-8",
+        usecols=lambda c: c in REPORT_COLUMNS,
+        dtype=REPORT_DTYPES,
+    )
 
     if "Objekt" not in df.columns:
         raise SystemExit("Spalte 'Objekt' wurde nicht gefunden.")
 
-    # Datums- & Hilfsspalten
+    # Datums- & Hilfsspalten (beide ändern df direkt, ohne Kopie)
     df = ensure_dates(df)
     df = add_computed_columns(df)
 
     # optional filtern
     if args.only:
-        needles = [s.lower() for s in args.only]
-        mask = df["Objekt"].fillna("").str.lower().apply(lambda x: any(n in x for n in needles))
+        # ein Regex mit allen Teilstrings, ein vektorisierter Scan über die Spalte
+        pattern = "|".join(re.escape(n) for n in args.only)
+        mask = df["Objekt"].str.contains(pattern, case=False, regex=True, na=False)
         df = df[mask]
 
     if df.empty:
         print("Keine passenden Zeilen gefunden.")
         return
 
-    # pro Objekt
-    for obj, g in df.groupby("Objekt"):
-        safe = "".join(ch if ch.isalnum() else "_" for ch in (obj or "Objekt")).strip("_")
-        out_pdf = outdir / f"{safe}_report.pdf"
-        make_report_for_object(g, out_pdf, obj_label=obj)
-        print(f"✔ Report geschrieben: {out_pdf}")
+    # pro Objekt eine PDF
+    jobs = []
+    for obj, g in df.groupby("Objekt", observed=True):
+        # ein einzelner Zeitraum ergibt keinen Verlauf (Δ% immer 0): kein Report
+        if len(g) < 2:
+            print(f"⚠ Objekt {obj}: nur {len(g)} Eintrag – Report übersprungen")
+            continue
+        safe = RE_UNSAFE_CHAR.sub("_", obj or "Objekt").strip("_")
+        jobs.append((obj, g, outdir / f"{safe}_report.pdf"))
+
+    # Rendern ist CPU-gebunden: parallel über Prozesse, ein Objekt pro Auftrag;
+    # bei einem Objekt (oder einem Kern) lohnt sich der Pool-Start nicht
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        for out_pdf in map(render_report, jobs):
+            print(f"✔ Report geschrieben: {out_pdf}")
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for out_pdf in executor.map(render_report, jobs):
+            print(f"✔ Report geschrieben: {out_pdf}")
 
 
 if __name__ == "__main__":
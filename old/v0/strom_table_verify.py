@@ -9,54 +9,77 @@ Benötigt: pandas
 """
 
 import argparse
-import math
-from datetime import datetime
+import sys
 import pandas as pd
 
 # ---------- Helpers ----------
 
-def num(x):
-    """Robust nach float wandeln: erlaubt '1'234.56, 1'234.56, 1 234,56 etc."""
-    if x is None or (isinstance(x, float) and math.isnan(x)):
-        return 0.0
-    s = str(x).strip()
-    if s == "" or s.lower() == "none":
-        return 0.0
-    s = s.replace("'", "").replace(" ", "").replace("\u00A0", "")  # geschütztes Leerzeichen
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
+def vec_num(s):
+    """
+    Spalte robust nach float wandeln: erlaubt '1'234.56, 1'234.56, 1 234,56 etc.
+    Vektorisiert (str.replace + to_numeric); leer/unlesbar -> 0.0.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64").fillna(0.0)
+    t = s.astype(str).str.strip().str.replace(r"[\u00A0' ]", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(t, errors="coerce").fillna(0.0)
+
+def col_num(df, col):
+    """Spalte col als float (vec_num), 0.0 wenn die Spalte fehlt."""
+    if col not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return vec_num(df[col])
 
 def round2(x):
     return float(f"{x:.2f}")
 
-def parse_dmy(s: str):
-    if not s or str(s).strip() == "":
-        return None
-    for fmt in ("%d.%m.%Y", "%d.%m.%y"):
-        try:
-            return datetime.strptime(str(s).strip(), fmt)
-        except ValueError:
-            continue
-    return None
-
-def months_between(d1, d2) -> float:
+def round2_col(s):
+    """
+    round2() für jeden Wert einer Spalte. Bewusst nicht Series.round(2):
+    numpy rundet über x*100 und weicht bei ...5-Beträgen um 1 Rp. ab.
+    """
+    return s.map(round2)
+
+def parse_dates(s):
     """
-    Ganze Monate zwischen d1 und d2.
+    Spalte TT.MM.JJJJ oder TT.MM.JJ -> datetime64 (NaT, wenn keines passt).
+    Zwei vektorisierte to_datetime-Durchläufe statt strptime pro Zeile.
+    """
+    s = s.astype("string").str.strip()
+    # cache=True: jedes unterschiedliche Datum nur einmal parsen (Perioden-
+    # grenzen wie 01.01./01.04. wiederholen sich über alle Objekte)
+    d = pd.to_datetime(s, format="%d.%m.%Y", errors="coerce", cache=True)
+    return d.fillna(pd.to_datetime(s, format="%d.%m.%y", errors="coerce", cache=True))
+
+def date_column(df, col):
+    """Datumsspalte geparst; fehlt sie, durchgehend NaT."""
+    if col not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    return parse_dates(df[col])
+
+def months_between(d1, d2):
+    """
+    Ganze Monate zwischen d1 und d2 (Spalten mit Timestamps), als float.
     Beispiel: 01.07.2025 -> 01.10.2025 = 3.
-    Falls Tag(d2) < Tag(d1), 1 Monat abziehen.
+    Falls Tag(d2) < Tag(d1), 1 Monat abziehen. Fehlt ein Datum: 0.
     """
-    if not d1 or not d2:
-        return 0.0
-    m = (d2.year - d1.year) * 12 + (d2.month - d1.month)
-    if d2.day < d1.day:
-        m -= 1
-    return float(max(m, 0))
+    m = (d2.dt.year - d1.dt.year) * 12 + (d2.dt.month - d1.dt.month)
+    m = m - (d2.dt.day < d1.dt.day).astype(int)
+    return m.clip(lower=0).fillna(0.0).astype("float64")
+
+YES_VALUES = ("true", "1", "yes", "ja")
+
+# Anzahl Konsolen-Blöcke pro sys.stdout.write()
+PRINT_BATCH = 256
+
+# Eingabe-Spalten, die format_console_block liest (Kopfzeile, GP-Flag)
+HEADER_COLUMNS = ("Objekt", "Zeitraum_von", "Zeitraum_bis", "Rechnungsnummer", "Grundpreis_verrechnet")
+
+# Balken-Vorrat: make_bar schneidet daraus, statt "█" * n pro Wert zu bauen
+FULL_BAR = "█" * 256
 
 def yn_flag(v) -> bool:
-    return str(v).strip().lower() in ("true", "1", "yes", "ja")
+    return str(v).strip().lower() in YES_VALUES
 
 def make_bar(values, width=44):
     """
@@ -64,110 +87,131 @@ def make_bar(values, width=44):
     """
     vmax = max([abs(v) for v in values] + [1.0])
     scale = width / vmax
+    # |v| <= vmax, also nie länger als width
+    full = FULL_BAR if width <= len(FULL_BAR) else "█" * width
     def bar(v):
-        n = int(round(abs(v) * scale))
-        return "█" * n
+        return full[:int(round(abs(v) * scale))]
     return bar
 
-# ---------- Kernberechnung pro Zeile ----------
+# ---------- Kernberechnung (spaltenweise) ----------
 
-def recompute_row(row):
+def recompute(df):
+    """
+    Alle Rechenschritte für alle Zeilen auf einmal: jede Spalte wird einmal
+    umgewandelt, der Rest ist elementweise Arithmetik auf float64-Spalten.
+    Liefert ein DataFrame mit den Ergebnis-Spalten (Index wie df).
+    """
     # Bezug in kWh
-    ht_kwh = num(row.get("HT_Bezug_kWh"))
-    nt_kwh = num(row.get("NT_Bezug_KWh") or row.get("NT_Bezug_kWh"))  # toleranter Key
+    ht_kwh = col_num(df, "HT_Bezug_kWh")
+    nt_kwh = col_num(df, "NT_Bezug_kWh")
+    if "NT_Bezug_KWh" in df.columns:  # toleranter Key, hat Vorrang
+        nt_alt = vec_num(df["NT_Bezug_KWh"])
+        nt_kwh = nt_alt.where(nt_alt != 0, nt_kwh)
     tot_kwh = ht_kwh + nt_kwh
 
     # Ansätze Energie/Netznutzung (CHF/kWh)
-    ht_e = num(row.get("HT_Energie_Ansatz_CHF_kWh"))
-    nt_e = num(row.get("NT_Energie_Ansatz_CHF_kWh"))
-    ht_n = num(row.get("HT_Netznutzung_Ansatz_CHF_kWh"))
-    nt_n = num(row.get("NT_Netznutzung_Ansatz_CHF_kWh"))
+    ht_e = col_num(df, "HT_Energie_Ansatz_CHF_kWh")
+    nt_e = col_num(df, "NT_Energie_Ansatz_CHF_kWh")
+    ht_n = col_num(df, "HT_Netznutzung_Ansatz_CHF_kWh")
+    nt_n = col_num(df, "NT_Netznutzung_Ansatz_CHF_kWh")
 
     # Abgaben-Ansätze (CHF/kWh)
-    sysd = num(row.get("Systemdienstleistungen_Ansatz_CHF"))
-    kev  = num(row.get("KEV_Ansatz_CHF"))
-    gem  = num(row.get("Abgabe_Gemeinde_Ansatz_CHF"))
-    res  = num(row.get("Stromreserve_Ansatz_CHF"))
+    abgaben = (
+        col_num(df, "Systemdienstleistungen_Ansatz_CHF")
+        + col_num(df, "KEV_Ansatz_CHF")
+        + col_num(df, "Abgabe_Gemeinde_Ansatz_CHF")
+        + col_num(df, "Stromreserve_Ansatz_CHF")
+    )
 
     # Grundpreis
-    gp_ans   = num(row.get("Grundpreis_Messstelle_Ansatz_CHF"))
-    gp_verr  = yn_flag(row.get("Grundpreis_verrechnet", ""))
-    d_von = parse_dmy(row.get("Zeitraum_von"))
-    d_bis = parse_dmy(row.get("Zeitraum_bis"))
-    monate = months_between(d_von, d_bis)
-    exkl_grundpreis = gp_ans * monate * (1.0 if gp_verr else 0.0)
+    gp_ans = col_num(df, "Grundpreis_Messstelle_Ansatz_CHF")
+    if "Grundpreis_verrechnet" in df.columns:
+        gp_verr = df["Grundpreis_verrechnet"].astype(str).str.strip().str.lower().isin(YES_VALUES)
+    else:
+        gp_verr = pd.Series(False, index=df.index)
+    monate = months_between(date_column(df, "Zeitraum_von"), date_column(df, "Zeitraum_bis"))
+    exkl_grundpreis = gp_ans * monate * gp_verr.astype("float64")
 
     # MWST
-    mwst_rate = num(row.get("MWST_Satz_prozent")) / 100.0
+    mwst_rate = col_num(df, "MWST_Satz_prozent") / 100.0
 
     # Teilbeträge exkl. MWST
     exkl_energie     = ht_kwh*ht_e + nt_kwh*nt_e
     exkl_netznutzung = ht_kwh*ht_n + nt_kwh*nt_n
-    exkl_abgaben     = tot_kwh * (sysd + kev + gem + res)
+    exkl_abgaben     = tot_kwh * abgaben
 
     exkl_summe = exkl_energie + exkl_netznutzung + exkl_abgaben + exkl_grundpreis
     mwst_betrag = exkl_summe * mwst_rate
     inkl_summe = exkl_summe + mwst_betrag
 
-    total_rechnung = num(row.get("Total_Objekt_CHF"))
-    delta = round2(inkl_summe) - round2(total_rechnung)
-    ok = abs(delta) <= 0.05  # 5 Rp. Toleranz
+    total_rechnung = col_num(df, "Total_Objekt_CHF")
+    # OK aus der ungerundeten Differenz (wie bisher), gespeichert wird sie gerundet
+    diff = round2_col(inkl_summe) - round2_col(total_rechnung)
 
-    return {
+    return pd.DataFrame({
         "Monate_Grundpreis": monate,
-        "Exkl_Energie_CHF": round2(exkl_energie),
-        "Exkl_Netznutzung_CHF": round2(exkl_netznutzung),
-        "Exkl_Abgaben_CHF": round2(exkl_abgaben),
-        "Exkl_Grundpreis_CHF": round2(exkl_grundpreis),
-        "Exkl_Summe_CHF": round2(exkl_summe),
-        "MWST_Satz_prozent": round2(mwst_rate*100.0),
-        "MWST_Betrag_CHF": round2(mwst_betrag),
-        "Recalc_Total_Inkl_CHF": round2(inkl_summe),
-        "Total_Objekt_CHF": round2(total_rechnung),
-        "Delta_CHF": round2(delta),
-        "OK": ok,
-    }
-
-def print_console_block(row_dict, src_row, idx, ascii_width=44):
-    """Hübscher Konsolen-Block mit Teilresultaten und ASCII-Balken."""
-    titel = f"{src_row.get('Objekt','(ohne Objekt)')} | {src_row.get('Zeitraum_von','?')} – {src_row.get('Zeitraum_bis','?')}"
-    rnr = src_row.get("Rechnungsnummer", "")
+        "Exkl_Energie_CHF": round2_col(exkl_energie),
+        "Exkl_Netznutzung_CHF": round2_col(exkl_netznutzung),
+        "Exkl_Abgaben_CHF": round2_col(exkl_abgaben),
+        "Exkl_Grundpreis_CHF": round2_col(exkl_grundpreis),
+        "Exkl_Summe_CHF": round2_col(exkl_summe),
+        "MWST_Satz_prozent": round2_col(mwst_rate*100.0),
+        "MWST_Betrag_CHF": round2_col(mwst_betrag),
+        "Recalc_Total_Inkl_CHF": round2_col(inkl_summe),
+        "Total_Objekt_CHF": round2_col(total_rechnung),
+        "Delta_CHF": round2_col(diff),
+        "OK": diff.abs() <= 0.05,  # 5 Rp. Toleranz
+    }, index=df.index)
+
+def format_console_block(res_row, src_row, idx, ascii_width=44):
+    """
+    Hübscher Konsolen-Block mit Teilresultaten und ASCII-Balken,
+    als ein String (main() schreibt mehrere Blöcke auf einmal).
+    res_row/src_row sind Zeilen aus itertuples() (Ergebnis bzw. Eingabe);
+    fehlende Eingabe-Spalten liefern den Default von getattr.
+    """
+    titel = f"{getattr(src_row, 'Objekt', '(ohne Objekt)')} | {getattr(src_row, 'Zeitraum_von', '?')} – {getattr(src_row, 'Zeitraum_bis', '?')}"
+    rnr = getattr(src_row, "Rechnungsnummer", "")
     label = f"[{idx+1}] {titel}"
     if rnr:
         label += f" | Rg-Nr: {rnr}"
 
-    ex_ene = row_dict["Exkl_Energie_CHF"]
-    ex_net = row_dict["Exkl_Netznutzung_CHF"]
-    ex_abg = row_dict["Exkl_Abgaben_CHF"]
-    ex_gp  = row_dict["Exkl_Grundpreis_CHF"]
-    ex_sum = row_dict["Exkl_Summe_CHF"]
-    mwst_p = row_dict["MWST_Satz_prozent"]
-    mwst_b = row_dict["MWST_Betrag_CHF"]
-    tot    = row_dict["Recalc_Total_Inkl_CHF"]
-    inv    = row_dict["Total_Objekt_CHF"]
-    delt   = row_dict["Delta_CHF"]
-    ok     = row_dict["OK"]
+    ex_ene = res_row.Exkl_Energie_CHF
+    ex_net = res_row.Exkl_Netznutzung_CHF
+    ex_abg = res_row.Exkl_Abgaben_CHF
+    ex_gp  = res_row.Exkl_Grundpreis_CHF
+    ex_sum = res_row.Exkl_Summe_CHF
+    mwst_p = res_row.MWST_Satz_prozent
+    mwst_b = res_row.MWST_Betrag_CHF
+    tot    = res_row.Recalc_Total_Inkl_CHF
+    inv    = res_row.Total_Objekt_CHF
+    delt   = res_row.Delta_CHF
+    ok     = res_row.OK
 
     bar = make_bar([ex_ene, ex_net, ex_abg, ex_gp, mwst_b, tot, inv], width=ascii_width)
-
-    print("=" * (len(label)))
-    print(label)
-    print("-" * (len(label)))
-    print(f"  Monate Grundpreis: {row_dict['Monate_Grundpreis']:.0f}   |  GP verrechnet: {yn_flag(src_row.get('Grundpreis_verrechnet',''))}")
-    print()
-    print(f"  Exkl. Energie      {ex_ene:10.2f} CHF  {bar(ex_ene)}")
-    print(f"  Exkl. Netznutzung  {ex_net:10.2f} CHF  {bar(ex_net)}")
-    print(f"  Exkl. Abgaben      {ex_abg:10.2f} CHF  {bar(ex_abg)}")
-    print(f"  Exkl. Grundpreis   {ex_gp:10.2f} CHF  {bar(ex_gp)}")
-    print(f"  -----------------  {'-'*10}      {'-'*min(10,ascii_width)}")
-    print(f"  Summe exkl. MWST   {ex_sum:10.2f} CHF")
-    print(f"  MWST  ({mwst_p:>5.2f}%)    {mwst_b:10.2f} CHF  {bar(mwst_b)}")
-    print(f"  -----------------  {'-'*10}      {'-'*min(10,ascii_width)}")
-    print(f"  Total (recalc)     {tot:10.2f} CHF  {bar(tot)}")
-    print(f"  Total (Rechnung)   {inv:10.2f} CHF  {bar(inv)}")
+    sep = f"  -----------------  {'-'*10}      {'-'*min(10,ascii_width)}"
     status = "OK ✅" if ok else "NICHT OK ❌"
-    print(f"  Delta              {delt:10.2f} CHF   --> {status}")
-    print()
+
+    lines = [
+        "=" * (len(label)),
+        label,
+        "-" * (len(label)),
+        f"  Monate Grundpreis: {res_row.Monate_Grundpreis:.0f}   |  GP verrechnet: {yn_flag(getattr(src_row, 'Grundpreis_verrechnet', ''))}",
+        "",
+        f"  Exkl. Energie      {ex_ene:10.2f} CHF  {bar(ex_ene)}",
+        f"  Exkl. Netznutzung  {ex_net:10.2f} CHF  {bar(ex_net)}",
+        f"  Exkl. Abgaben      {ex_abg:10.2f} CHF  {bar(ex_abg)}",
+        f"  Exkl. Grundpreis   {ex_gp:10.2f} CHF  {bar(ex_gp)}",
+        sep,
+        f"  Summe exkl. MWST   {ex_sum:10.2f} CHF",
+        f"  MWST  ({mwst_p:>5.2f}%)    {mwst_b:10.2f} CHF  {bar(mwst_b)}",
+        sep,
+        f"  Total (recalc)     {tot:10.2f} CHF  {bar(tot)}",
+        f"  Total (Rechnung)   {inv:10.2f} CHF  {bar(inv)}",
+        f"  Delta              {delt:10.2f} CHF   --> {status}",
+        "",
+    ]
+    return "\n".join(lines) + "\n"
 
 # ---------- main ----------
 
@@ -189,19 +233,27 @@ def main():
         else:
             print("Warnung: 'Objekt'-Spalte nicht gefunden; Filter wird ignoriert.")
 
-    results = []
-    shown = 0
-    for idx, (_, src_row) in enumerate(df.iterrows()):
-        res = recompute_row(src_row)
-        results.append(res)
-        # Konsole: Teilresultate anzeigen
-        print_console_block(res, src_row, idx)
-        shown += 1
-        if args.limit and shown >= args.limit:
-            break
+    df = df.reset_index(drop=True)
+    res = recompute(df)
+
+    # Konsole: Teilresultate anzeigen (nur die Ausgabe läuft pro Zeile)
+    # Zahlen sind in recompute() schon spaltenweise umgewandelt; von der
+    # Eingabe brauchen die Blöcke nur die Kopf-Spalten. itertuples() liefert
+    # Namedtuples, ohne pro Zeile ein Dict oder eine Series aufzubauen.
+    n_show = args.limit if args.limit else len(df)
+    src = df.head(n_show)[[c for c in HEADER_COLUMNS if c in df.columns]]
+    rows = zip(src.itertuples(index=False), res.head(n_show).itertuples(index=False))
+    # blockweise schreiben: ein write() pro PRINT_BATCH Zeilen statt ~17 print()
+    batch = []
+    for idx, (src_row, res_row) in enumerate(rows):
+        batch.append(format_console_block(res_row, src_row, idx))
+        if len(batch) >= PRINT_BATCH:
+            sys.stdout.write("".join(batch))
+            batch.clear()
+    sys.stdout.write("".join(batch))
 
     # verifizierte CSV schreiben (alle Zeilen, nicht nur gefilterte Anzeige)
-    df_out = pd.concat([df.reset_index(drop=True), pd.DataFrame(results)], axis=1)
+    df_out = pd.concat([df, res], axis=1)
     out_path = args.out if args.out else args.csv.replace(".csv", "_verified.csv")
     df_out.to_csv(out_path, sep=args.sep, index=False, encoding="utf-8")
     print(f"geschrieben: {out_path}")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Text-Cache für die v0-Scan-Skripte (SQLite, eine Datei neben den Skripten).
+
+Eine Zeile pro PDF-Pfad; gültig, solange Backend, mtime_ns und Grösse
+passen. Ändert sich die Datei, wird die Zeile ersetzt (nicht ergänzt).
+Gespeichert werden die Seiten-Texte (JSON, zlib-komprimiert), damit die
+Skripte weiterhin gezielt Seite 1 prüfen können. Teil-Einträge (nur
+Seite 1, complete = 0) werden bei Bedarf durch den ganzen Text ersetzt.
+Zeilen zu PDFs, die es nicht mehr gibt (verschoben, gelöscht), entfernt
+prune(); die Skripte rufen es einmal vor dem Prozess-Pool auf.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Callable
+
+from pdf_text import BACKEND, iter_page_texts
+
+CACHE_DB = Path(__file__).resolve().parent / ".cache.db"
+SCHEMA_VERSION = 1
+
+# eine Verbindung pro Prozess (Worker im Prozess-Pool öffnen ihre eigene)
+_conn: sqlite3.Connection | None = None
+_conn_pid: int | None = None
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        conn = sqlite3.connect(CACHE_DB, timeout=30, isolation_level=None)
+        # WAL: Leser blockieren den Schreiber nicht (mehrere Worker)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Schema nur beim ersten Mal anlegen (user_version lesen braucht
+        # keine Schreibsperre); die frühere Tabelle "texts" fällt dabei weg
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS texts")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages "
+                "(path TEXT PRIMARY KEY, stamp TEXT, complete INTEGER, text BLOB)"
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        _conn, _conn_pid = conn, os.getpid()
+    return _conn
+
+
+def prune() -> None:
+    """
+    Zeilen zu PDFs löschen, die es nicht mehr gibt (verschoben, gelöscht).
+    Einmal pro Lauf im Hauptprozess aufrufen, bevor der Prozess-Pool startet.
+    Die Verbindung wird danach geschlossen: geforkte Worker sollen keine
+    offene SQLite-Verbindung erben.
+    """
+    global _conn
+    conn = _connect()
+    try:
+        gone = [(p,) for (p,) in conn.execute("SELECT path FROM pages") if not os.path.exists(p)]
+        if gone:
+            conn.executemany("DELETE FROM pages WHERE path = ?", gone)
+    finally:
+        conn.close()
+        _conn = None
+
+
+def _stamp(path: str) -> str:
+    st = os.stat(path)
+    return f"{BACKEND}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _load(path: str, stamp: str) -> tuple[list[str], bool] | None:
+    row = _connect().execute(
+        "SELECT stamp, complete, text FROM pages WHERE path = ?", (path,)
+    ).fetchone()
+    if row is None or row[0] != stamp:
+        return None
+    return json.loads(zlib.decompress(row[2])), bool(row[1])
+
+
+def _store(path: str, stamp: str, pages: list[str], complete: bool) -> None:
+    blob = zlib.compress(json.dumps(pages).encode("utf-8"), 1)
+    _connect().execute(
+        "INSERT OR REPLACE INTO pages (path, stamp, complete, text) VALUES (?, ?, ?, ?)",
+        (path, stamp, int(complete), blob),
+    )
+
+
+def get_pages(pdf_path: Path) -> list[str]:
+    """
+    PDF -> Text pro Seite, aus dem Cache oder frisch extrahiert (und gespeichert).
+    """
+    path = os.path.abspath(pdf_path)
+    stamp = _stamp(path)
+    cached = _load(path, stamp)
+    if cached is not None and cached[1]:
+        return cached[0]
+
+    pages = list(iter_page_texts(pdf_path))
+    _store(path, stamp, pages, complete=True)
+    return pages
+
+
+def get_text(pdf_path: Path) -> str:
+    """
+    PDF -> reiner Text (alle Seiten), über den Cache.
+    """
+    return "\n".join(get_pages(pdf_path))
+
+
+def get_pages_if_first_page(pdf_path: Path, accept: Callable[[str], bool]) -> list[str] | None:
+    """
+    Text pro Seite, wenn accept(Text von Seite 1) True ist, sonst None.
+    Für Skripte, deren Provider-Keyword immer auf Seite 1 steht (Strom):
+    bei einem Cache-Fehlschlag wird zuerst nur Seite 1 extrahiert, der Rest
+    nur, wenn sie passt. Abgelehnt wird Seite 1 allein gespeichert
+    (complete = 0).
+    """
+    path = os.path.abspath(pdf_path)
+    stamp = _stamp(path)
+    cached = _load(path, stamp)
+    if cached is not None:
+        pages, complete = cached
+        if not accept(pages[0] if pages else ""):
+            return None
+        return pages if complete else get_pages(pdf_path)
+
+    it = iter_page_texts(pdf_path)
+    try:
+        first = next(it, "")
+        if not accept(first):
+            _store(path, stamp, [first], complete=False)
+            return None
+        pages = [first, *it]
+    finally:
+        it.close()
+    _store(path, stamp, pages, complete=True)
+    return pages
+
+
+def get_text_if_match(pdf_path: Path, accept: Callable[[str], bool]) -> str | None:
+    """
+    Text aller Seiten, wenn accept() passt, sonst None.
+    Passt schon Seite 1, gilt das PDF ohne weitere Prüfung; sonst entscheidet
+    accept(ganzer Text), die Keywords dürfen also auf jeder Seite stehen
+    (wie in den Buildern). Gelesen wird das PDF so oder so ganz: zum Parsen
+    bzw. zum Prüfen der restlichen Seiten.
+    """
+    pages = get_pages(pdf_path)
+    text = "\n".join(pages)
+    if pages and accept(pages[0]):
+        return text
+    if len(pages) > 1 and accept(text):
+        return text
+    return None
@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
 import os
 import argparse
+from pathlib import Path
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # nur PDFs schreiben, kein GUI-Backend (vor pyplot setzen)
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
+from repo_root import import_shared
+
+_frame_cache = import_shared("frame_cache", package="old")
+
 MONTH_LABELS = ["Jan", "Feb", "Mrz", "Apr", "Mai", "Jun",
                 "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
 
+# Nur diese Spalten werden gebraucht (Datei usw. gar nicht erst einlesen);
+# Datumsspalten als Text, die Umwandlung macht to_datetime
+USED_COLUMNS = {"Rechnungsdatum", "Betrag_num", "Bis_Datum", "Schlusssaldo_num"}
+CSV_DTYPES = {"Rechnungsdatum": str, "Bis_Datum": str}
+# Datumsformat aller CSV-Builder (TT.MM.JJJJ); fest vorgegeben statt dayfirst-Erkennung
+CSV_DATE_FMT = "%d.%m.%Y"
+
+# Eingelesene CSVs (neben den Skripten, wie .cache.db); siehe load_data_cached
+CSV_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
 
 def load_data(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
     """
@@ -26,7 +43,13 @@ def load_data(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV-Datei nicht gefunden: {csv_path}")
 
-    df = pd.read_csv(csv_path, sep=sep, encoding="utf-8")
+    df = pd.read_csv(
+        csv_path,
+        sep=sep,
+        encoding="utf-8",
+        usecols=lambda c: c in USED_COLUMNS,
+        dtype=CSV_DTYPES,
+    )
 
     mode = None
 
@@ -35,7 +58,7 @@ def load_data(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
         mode = "invoice"
 
         df["Rechnungsdatum"] = pd.to_datetime(
-            df["Rechnungsdatum"], dayfirst=True, errors="coerce"
+            df["Rechnungsdatum"], format=CSV_DATE_FMT, errors="coerce"
         )
         df["Betrag_num"] = pd.to_numeric(df["Betrag_num"], errors="coerce")
 
@@ -48,7 +71,7 @@ def load_data(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
         mode = "statement"
 
         df["Bis_Datum"] = pd.to_datetime(
-            df["Bis_Datum"], dayfirst=True, errors="coerce"
+            df["Bis_Datum"], format=CSV_DATE_FMT, errors="coerce"
         )
         df["Schlusssaldo_num"] = pd.to_numeric(df["Schlusssaldo_num"], errors="coerce")
 
@@ -67,18 +90,43 @@ def load_data(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
     return df, mode
 
 
-def create_yearly_overview(df: pd.DataFrame, year: int, label: str,
-                           output_path: str, mode: str):
-    # Daten fuer das angegebene Jahr filtern
-    df_year = df[df["Datum"].dt.year == year].copy()
+def load_data_cached(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, str]:
+    """
+    Wie load_data(), aber über CSV_CACHE_DIR (old/frame_cache.py):
+    solange die CSV unverändert ist (Pfad, mtime, Grösse, Separator), kommt
+    (df, mode) aus dem Pickle, ohne CSV-Parsing und Datumsumwandlung.
+    """
+    return _frame_cache.load_cached(
+        csv_path, lambda p: load_data(p, sep=sep), CSV_CACHE_DIR, extra_key=(sep,)
+    )
+
+
+def monthly_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monatssummen ('sum') und Anzahl Einträge ('count') über alle Jahre in
+    einem resample-Durchlauf; Index = Monatsanfang. Ein Jahr daraus ist nur
+    noch ein Slice, auch wenn mehrere Jahresberichte erzeugt werden.
+    """
+    return df.set_index("Datum")["Wert"].resample("MS").agg(["sum", "count"])
 
-    if df_year.empty:
-        raise ValueError(f"Keine Daten fuer das Jahr {year} gefunden.")
 
+def create_yearly_overview(df: pd.DataFrame, year: int, label: str,
+                           output_path: str, mode: str,
+                           monthly_all: pd.DataFrame | None = None):
+    """
+    Jahresbericht als PDF. monthly_all (nur Modus 'invoice') ist das Ergebnis
+    von monthly_totals(df); ohne wird es hier berechnet.
+    """
     # ----------------- Modus: Rechnungen (Monatssummen) -----------------
     if mode == "invoice":
-        df_year["Monat"] = df_year["Datum"].dt.month
-        monthly = df_year.groupby("Monat")["Wert"].sum()
+        if monthly_all is None:
+            monthly_all = monthly_totals(df)
+        months = monthly_all[monthly_all.index.year == year]
+        count = int(months["count"].sum())
+        if count == 0:
+            raise ValueError(f"Keine Daten fuer das Jahr {year} gefunden.")
+
+        monthly = months["sum"].set_axis(months.index.month)
         monthly = monthly.reindex(range(1, 13), fill_value=0.0)
         total = monthly.sum()
 
@@ -95,7 +143,7 @@ def create_yearly_overview(df: pd.DataFrame, year: int, label: str,
         text = (
             f"Jahr: {year}\n"
             f"Total Zahlungen: {total:.2f} CHF\n"
-            f"Anzahl Einträge: {len(df_year)}"
+            f"Anzahl Einträge: {count}"
         )
         plt.gcf().text(
             0.02, 0.02, text,
@@ -110,8 +158,14 @@ def create_yearly_overview(df: pd.DataFrame, year: int, label: str,
 
     # ----------------- Modus: Kontoauszug (Saldo-Verlauf + Ableitung) -----------------
     elif mode == "statement":
+        # Daten fuer das angegebene Jahr filtern (nur die Spalten fuer den Plot;
+        # .loc mit Spaltenliste liefert ohnehin einen eigenen Frame)
+        df_year = df.loc[df["Datum"].dt.year == year, ["Datum", "Wert"]]
+        if df_year.empty:
+            raise ValueError(f"Keine Daten fuer das Jahr {year} gefunden.")
+
         # nach Datum sortieren
-        df_year = df_year.sort_values("Datum").copy()
+        df_year = df_year.sort_values("Datum")
 
         # Differenz (Ableitung) berechnen
         df_year["Delta"] = df_year["Wert"].diff()
@@ -158,7 +212,7 @@ def create_yearly_overview(df: pd.DataFrame, year: int, label: str,
     print(f"PDF gespeichert als: {output_path}")
 
 
-def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description=(
             "Generischer Jahresreport aus CSV.\n"
@@ -192,18 +246,28 @@ def main():
         default=";",
         help="CSV-Separator (Standard: ';').",
     )
-    args = parser.parse_args()
+    return parser.parse_args(argv)
 
-    csv_path = os.path.abspath(args.csv)
+
+def main(csv: str | None = None, year: int | None = None, label: str | None = None,
+         out: str | None = None, sep: str = ";"):
+    """
+    Einstieg fuer CLI und fuer den direkten Aufruf aus anderen Skripten
+    (z.B. all_scan_move_report.py), ohne neuen Python-Prozess.
+    Ohne 'csv' werden die Argumente von der Kommandozeile gelesen.
+    """
+    if csv is None:
+        args = parse_args()
+        csv, year, label, out, sep = args.csv, args.year, args.label, args.out, args.sep
+
+    csv_path = os.path.abspath(csv)
     base_dir = os.path.dirname(csv_path)
 
     # Label bestimmen
-    if args.label:
-        label = args.label
-    else:
+    if not label:
         label = os.path.splitext(os.path.basename(csv_path))[0]
 
-    df, mode = load_data(csv_path, sep=args.sep)
+    df, mode = load_data_cached(csv_path, sep=sep)
 
     years = sorted(df["Datum"].dt.year.unique())
     if not years:
@@ -211,8 +275,7 @@ def main():
         return
 
     # Jahr bestimmen
-    if args.year is not None:
-        year = args.year
+    if year is not None:
         if year not in years:
             print(f"Warnung: Jahr {year} nicht im CSV enthalten. Verfuegbare Jahre: {years}")
     else:
@@ -220,14 +283,15 @@ def main():
         print(f"Kein Jahr angegeben, verwende automatisch: {year}")
 
     # Output-Pfad bestimmen
-    if args.out:
-        output_path = os.path.abspath(args.out)
+    if out:
+        output_path = os.path.abspath(out)
     else:
         safe_label = label.replace(" ", "_")
         output_name = f"{safe_label}_report_{year}.pdf"
         output_path = os.path.join(base_dir, output_name)
 
-    create_yearly_overview(df, year, label, output_path, mode)
+    monthly_all = monthly_totals(df) if mode == "invoice" else None
+    create_yearly_overview(df, year, label, output_path, mode, monthly_all=monthly_all)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Betrags-Normalisierung für alle Provider.
+"""
+from __future__ import annotations
+
+# Tausender-Trennzeichen (Apostroph, Leerzeichen, geschütztes Leerzeichen)
+# in einem C-Durchlauf via str.translate entfernen
+_CHF_TRANS = str.maketrans("", "", " '\xa0")
+
+
+def normalize_amount(amount_str: str) -> float | None:
+    """
+    Betragstring in float umwandeln.
+    z.B. "1'234.50", "1 234,50" oder "- 1'234,50" -> 1234.5 / -1234.5
+    """
+    try:
+        s = amount_str.translate(_CHF_TRANS)
+        # Schnellpfad: CHF-Format "1234.50" braucht keine weitere Umformung
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".") if "." in s else s.replace(",", ".")
+        return float(s)
+    except (AttributeError, ValueError):
+        return None
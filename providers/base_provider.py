@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import re
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, ClassVar, Dict, List
 
 
 class InvoiceProvider(ABC):
@@ -14,6 +15,20 @@ class InvoiceProvider(ABC):
     #: Alle diese Keywords MUESSEN im Text vorkommen (case-insensitive).
     REQUIRED_KEYWORDS: List[str] = []
 
+    #: Vorkompilierte Muster zu REQUIRED_KEYWORDS (siehe __init_subclass__).
+    _compiled_keywords: ClassVar[List[re.Pattern]] = []
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Kompiliert die REQUIRED_KEYWORDS einmal pro Provider-Klasse:
+        case-insensitive, Leerzeichen passen auch auf geschützte Leerzeichen.
+        """
+        super().__init_subclass__(**kwargs)
+        cls._compiled_keywords = [
+            re.compile(re.escape(kw).replace("\\ ", "[ \xa0]"), re.IGNORECASE)
+            for kw in cls.REQUIRED_KEYWORDS
+        ]
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -25,16 +40,11 @@ class InvoiceProvider(ABC):
         Standard-Implementierung:
         - Alle REQUIRED_KEYWORDS müssen vorkommen
         """
-        if not self.REQUIRED_KEYWORDS:
+        if not self._compiled_keywords:
             return False
 
-        upper = text.upper().replace("\xa0", " ")
-
-        # alle required Keywords müssen drin sein
-        for kw in self.REQUIRED_KEYWORDS:
-            if kw.upper() not in upper:
-                return False
-        return True
+        # alle required Keywords müssen drin sein (ohne Kopie via upper())
+        return all(p.search(text) for p in self._compiled_keywords)
 
     @abstractmethod
     def parse_invoice(self, text: str, filename: str) -> Dict[str, Any]:
@@ -73,3 +83,17 @@ class InvoiceProvider(ABC):
         ['Rechnungsdatum', 'Betrag_roh', 'Betrag_num', 'Datei']
         """
         ...
+
+    def csv_row(self, data: Dict[str, Any]) -> tuple:
+        """
+        Ergebnis von parse_invoice() -> eine CSV-Zeile passend zu csv_header.
+        Standard: (date, amount mit 2 Nachkommastellen, file).
+        Gemeinsam genutzt von sort_all (Zeile beim Einsortieren anhängen)
+        und den CSV-Buildern (kompletter Neuaufbau).
+        """
+        amount = data.get("amount", None)
+        return (
+            data.get("date", "") or "",
+            "" if amount is None else format(amount, ".2f"),
+            data.get("file", ""),
+        )
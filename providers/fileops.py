@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Datei-Hilfen für Sorter und v0-Skripte.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+from pathlib import Path
+
+
+def move_file(src: Path, dst: Path) -> None:
+    """
+    Verschiebt src nach dst. Auf demselben Laufwerk reicht os.replace()
+    (atomar, überschreibt ein vorhandenes dst auch unter Windows);
+    nur bei einem anderen Laufwerk (EXDEV) wird kopiert + gelöscht.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame PDF-Text-Extraktion für Provider, Sorter und CSV-Builder.
+
+Wir brauchen nur den reinen Text für Keyword-Checks und Regex, nicht das
+Layout von pdfplumber. Reihenfolge der Backends (das erste installierte
+gewinnt): pypdfium2, pdfplumber. Beide liefern eine Tabellenzeile als eine
+Textzeile ("Schlusssaldo 12'345.60"), darauf bauen die zeilenbasierten
+Regex der Provider und v0-Skripte. PyMuPDF setzt jede Zelle auf eine eigene
+Zeile und ist deshalb (noch) kein Backend.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Anteil der Seitenhöhe (von oben), der als Briefkopf gilt
+HEADER_FRACTION = 0.30
+
+# Ab dieser Grösse liest pdfplumber über mmap (kleinere PDFs: normales open)
+MMAP_MIN_BYTES = 64 * 1024
+
+# Name des aktiven Backends (Teil des Cache-Schlüssels: anderes Backend,
+# anderer Text). find_spec() sucht das Paket nur, importiert es nicht.
+BACKEND = "pdfium" if find_spec("pypdfium2") else "pdfplumber"
+
+_BACKEND_MODULES = {"pdfium": "pypdfium2", "pdfplumber": "pdfplumber"}
+_backend_module = None
+
+
+def _backend():
+    """
+    Backend-Modul erst beim ersten PDF importieren: Läufe ohne PDF (leerer
+    Inbox-Ordner, --help) sparen so den Import von PDFium/pdfminer.
+    """
+    global _backend_module
+    if _backend_module is None:
+        _backend_module = import_module(_BACKEND_MODULES[BACKEND])
+    return _backend_module
+
+
+def iter_page_texts(pdf_path: Path) -> Iterator[str]:
+    """
+    PDF -> Text pro Seite (Generator).
+    Das Dokument bleibt nur offen, solange iteriert wird; bricht der
+    Aufrufer früh ab, werden die restlichen Seiten nicht mehr gelesen.
+
+    Die Seiten werden bewusst seriell gelesen: PDFium-Dokumente dürfen
+    nicht aus mehreren Threads benutzt werden, und pdfminer (unter
+    pdfplumber) ist reines Python und hält den GIL. Parallelisiert wird
+    stattdessen über die Dateien (Prozess-Pool in Buildern/Skripten).
+    """
+    if BACKEND == "pdfplumber":
+        yield from _iter_page_texts_pdfplumber(pdf_path)
+        return
+
+    pdf = _backend().PdfDocument(pdf_path)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+                page.close()
+            # PDFium trennt Zeilen mit \r\n, pdfplumber mit \n
+            yield text.replace("\r\n", "\n")
+    finally:
+        pdf.close()
+
+
+
+@contextmanager
+def _open_pdfplumber(pdf_path: Path):
+    """
+    pdfplumber-Fallback öffnen. Grosse PDFs werden per mmap geöffnet: die
+    Daten kommen direkt aus dem Page-Cache statt über einen zusätzlichen
+    Puffer (kein BytesIO-Kopie), auch bei OneDrive-Ordnern.
+    (PDFium liest die Datei ohnehin selbst und braucht das nicht.)
+    """
+    pdfplumber = _backend()
+    if os.path.getsize(pdf_path) < MMAP_MIN_BYTES:
+        with pdfplumber.open(pdf_path) as pdf:
+            yield pdf
+        return
+
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with pdfplumber.open(mm) as pdf:
+            yield pdf
+
+
+def _iter_page_texts_pdfplumber(pdf_path: Path) -> Iterator[str]:
+    with _open_pdfplumber(pdf_path) as pdf:
+        for page in pdf.pages:
+            yield _plumber_page_text(page)
+
+
+def _plumber_page_text(page) -> str:
+    """
+    Text einer pdfplumber-Seite; danach den Seiten-Cache (chars, Textmap)
+    sofort freigeben, sonst hält pdf.pages alle Seiten bis zum Schluss.
+    Gröbere x/y_tolerance bzw. extract_text_simple() brachten gemessen
+    keinen Gewinn: die Zeit steckt im pdfminer-Parsing, nicht im Clustern.
+    """
+    try:
+        return page.extract_text() or ""
+    finally:
+        page.close()
+
+
+def extract_text_from_pdf(pdf_path: Path) -> str:
+    """
+    PDF -> reiner Text (alle Seiten).
+    """
+    return "\n".join(iter_page_texts(pdf_path))
+
+
+def extract_first_page_text(pdf_path: Path) -> str:
+    """
+    PDF -> Text nur von Seite 1.
+    Reicht für matches(), ohne das ganze Dokument zu extrahieren.
+    """
+    pages = iter_page_texts(pdf_path)
+    try:
+        return next(pages, "")
+    finally:
+        pages.close()
+
+
+def extract_header_text(pdf_path: Path, fraction: float = HEADER_FRACTION) -> str:
+    """
+    PDF -> Text nur aus dem oberen Teil (fraction der Höhe) von Seite 1.
+    Für die Provider-Erkennung reicht oft der Briefkopf; der Rest der Seite
+    muss dafür nicht extrahiert werden.
+    """
+    if BACKEND == "pdfplumber":
+        with _open_pdfplumber(pdf_path) as pdf:
+            if not pdf.pages:
+                return ""
+            page = pdf.pages[0]
+            x0, top, x1, bottom = page.bbox
+            try:
+                return page.crop((x0, top, x1, top + (bottom - top) * fraction)).extract_text() or ""
+            finally:
+                page.close()
+
+    pdf = _backend().PdfDocument(pdf_path)
+    try:
+        if len(pdf) == 0:
+            return ""
+        page = pdf[0]
+        textpage = page.get_textpage()
+        try:
+            # PDF-Koordinaten: Ursprung unten links
+            width, height = page.get_size()
+            text = textpage.get_text_bounded(
+                left=0, bottom=height * (1 - fraction), right=width, top=height
+            )
+        finally:
+            textpage.close()
+            page.close()
+        return text.replace("\r\n", "\n")
+    finally:
+        pdf.close()
+
+
+def extract_text_if_match(
+    pdf_path: Path,
+    accept: Callable[[str], bool],
+    cache_dir: Path | None = None,
+) -> str | None:
+    """
+    PDF -> Text aller Seiten, wenn accept(ganzer Text) True ist; sonst None.
+    Gleiche Regel mit und ohne Cache-Treffer: accept() sieht immer den ganzen
+    Text, auch wenn die Keywords über mehrere Seiten verteilt sind. Mit
+    cache_dir landen auch abgelehnte PDFs im Text-Cache (gelesen wurden sie
+    ohnehin ganz).
+    """
+    text = extract_text_cached(pdf_path, cache_dir)
+    return text if accept(text) else None
+
+
+def probe_pages(
+    pdf_path: Path,
+    probe: Callable[[str], T | None],
+    cache_dir: Path | None = None,
+    header_first: bool = False,
+    full_text: bool = False,
+) -> tuple[T | None, str]:
+    """
+    PDF seitenweise lesen und nach jeder Seite probe(bisheriger Text) aufrufen;
+    beim ersten Ergebnis != None wird abgebrochen, die restlichen Seiten
+    werden nicht mehr extrahiert.
+    Rückgabe: (Ergebnis oder None, bis dahin gelesener Text).
+
+    Mit cache_dir wird zuerst im Text-Cache gesucht. Gespeichert wird nur,
+    wenn das ganze PDF gelesen wurde (sonst wäre der Eintrag unvollständig).
+    Mit header_first wird vor den ganzen Seiten nur der Briefkopf von Seite 1
+    geprüft (extract_header_text); ein Treffer dort beendet die Suche.
+    Mit full_text wird nach einem Treffer nicht abgebrochen, sondern der Rest
+    ohne weitere probe()-Aufrufe gelesen: der Text ist dann vollständig (z.B.
+    zum Parsen) und landet im Cache.
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = cache_dir / f"{pdf_cache_key(pdf_path)}.txt"
+        text = _read_cache(cache_file)
+        if text is not None:
+            return probe(text), text
+
+    result = None
+    if header_first:
+        header = extract_header_text(pdf_path)
+        if header.strip():
+            result = probe(header)
+            if result is not None and not full_text:
+                return result, header
+
+    text = ""
+    pages = iter_page_texts(pdf_path)
+    try:
+        for i, page_text in enumerate(pages):
+            text = page_text if i == 0 else f"{text}\n{page_text}"
+            # leere Seiten (Scan) ändern nichts am Ergebnis
+            if result is None and page_text.strip():
+                result = probe(text)
+                if result is not None and not full_text:
+                    return result, text
+    finally:
+        pages.close()
+
+    if cache_file is not None:
+        _write_cache(cache_file, text)
+    return result, text
+
+
+# ---- Text-Cache (pro PDF-Inhalt) ----
+
+def pdf_cache_key(pdf_path: Path) -> str:
+    """
+    Schlüssel für den Text-Cache: Backend + BLAKE2b-Hash des PDF-Inhalts.
+    Gleiche Datei an anderem Ort (z.B. nach dem Einsortieren) -> gleicher Key.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return f"{BACKEND}-{h.hexdigest()}"
+
+
+def _read_cache(cache_file: Path) -> str | None:
+    try:
+        with open(cache_file, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cache(cache_file: Path, text: str) -> None:
+    # erst in eine Temp-Datei, dann ersetzen: parallele Worker sehen nie
+    # einen halb geschriebenen Eintrag
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp, cache_file)
+
+
+def extract_text_cached(pdf_path: Path, cache_dir: Path | None) -> str:
+    """
+    Wie extract_text_from_pdf(), aber mit Text-Cache unter cache_dir
+    (None = ohne Cache). Spart bei wiederholten Läufen das PDF-Parsing.
+    """
+    if cache_dir is None:
+        return extract_text_from_pdf(pdf_path)
+
+    cache_file = cache_dir / f"{pdf_cache_key(pdf_path)}.txt"
+    text = _read_cache(cache_file)
+    if text is None:
+        text = extract_text_from_pdf(pdf_path)
+        _write_cache(cache_file, text)
+    return text
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Provider-Erkennung in einem Durchlauf über den Text.
+
+Statt pro Provider den ganzen Text neu in Grossbuchstaben zu kopieren und
+jedes Keyword einzeln zu suchen, wird der Text einmal normalisiert und alle
+REQUIRED_KEYWORDS aller Provider werden gemeinsam gesucht. Ist pyahocorasick
+installiert, geschieht das mit einem Aho-Corasick-Automaten in einem einzigen
+Scan. Sonst findet ein gemeinsamer Regex (je ein Leit-Keyword pro Provider)
+in einem Durchlauf die Kandidaten; nur deren übrige Keywords werden danach
+per Substring-Test geprüft.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Sequence
+
+from .base_provider import InvoiceProvider
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def normalize_for_match(text: str) -> str:
+    """
+    Gleiche Normalisierung wie InvoiceProvider.matches():
+    Grossbuchstaben, geschützte Leerzeichen -> normale Leerzeichen.
+    """
+    return text.upper().replace("\xa0", " ")
+
+
+class ProviderMatcher:
+    """
+    Findet zu einem Text den ersten passenden Provider (Reihenfolge der Liste).
+    Ein Provider passt, wenn alle seine REQUIRED_KEYWORDS vorkommen.
+    """
+
+    def __init__(self, providers: Sequence[InvoiceProvider]):
+        self.providers: List[InvoiceProvider] = list(providers)
+        # pro Provider ohne Duplikate, damit "alle gefunden" = Anzahl Treffer
+        self._keywords: List[List[str]] = [
+            list(dict.fromkeys(kw.upper() for kw in p.REQUIRED_KEYWORDS))
+            for p in self.providers
+        ]
+
+        self._automaton = None
+        self._dispatch_re: re.Pattern | None = None
+        self._always: set[int] = set()
+        if ahocorasick is None:
+            self._build_dispatch()
+        else:
+            automaton = ahocorasick.Automaton()
+            # ein Keyword kann bei mehreren Providern vorkommen
+            owners: dict[str, list[tuple[int, int]]] = {}
+            for p_idx, kws in enumerate(self._keywords):
+                for kw_idx, kw in enumerate(kws):
+                    owners.setdefault(kw, []).append((p_idx, kw_idx))
+            for kw, refs in owners.items():
+                automaton.add_word(kw, refs)
+            if owners:
+                automaton.make_automaton()
+                self._automaton = automaton
+
+    def _build_dispatch(self) -> None:
+        """
+        Ein Regex mit einer benannten Gruppe pro Provider ("p0", "p1", ...),
+        jeweils mit dem längsten (= am ehesten eindeutigen) Keyword.
+        Steckt ein Leit-Keyword in einem anderen, kann die Alternation es
+        verdecken; solche Provider sind deshalb immer Kandidat.
+        """
+        leads = {i: max(kws, key=len) for i, kws in enumerate(self._keywords) if kws}
+        if not leads:
+            return
+        self._always = {
+            i for i, kw in leads.items()
+            if any(j != i and kw in other for j, other in leads.items())
+        }
+        self._dispatch_re = re.compile(
+            "|".join(f"(?P<p{i}>{re.escape(kw)})" for i, kw in leads.items())
+        )
+
+    def match(self, text: str) -> InvoiceProvider | None:
+        """
+        Liefert den ersten Provider, dessen Keywords alle im Text stehen.
+        """
+        upper = normalize_for_match(text)
+
+        if self._automaton is None:
+            if self._dispatch_re is None:
+                return None
+            # ein Scan liefert die Kandidaten, geprüft wird in Listen-Reihenfolge
+            candidates = set(self._always)
+            for m in self._dispatch_re.finditer(upper):
+                candidates.add(int(m.lastgroup[1:]))
+            for idx in sorted(candidates):
+                if all(kw in upper for kw in self._keywords[idx]):
+                    return self.providers[idx]
+            return None
+
+        found: list[set[int]] = [set() for _ in self.providers]
+        for _, refs in self._automaton.iter(upper):
+            for p_idx, kw_idx in refs:
+                found[p_idx].add(kw_idx)
+
+        for provider, kws, hits in zip(self.providers, self._keywords, found):
+            if kws and len(hits) == len(kws):
+                return provider
+        return None
@@ -5,20 +5,18 @@ from pathlib import Path
 from typing import Any, Dict, List
 import re
 
-import pdfplumber
-
+from .amount import normalize_amount
 from .base_provider import InvoiceProvider
 from settings import SWISSCARD_DIR, SWISSCARD_CSV
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    """
-    PDF -> reiner Text (alle Seiten).
-    """
-    chunks: List[str] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            chunks.append(page.extract_text() or "")
-    return "\n".join(chunks)
+# ---- Vorkompilierte Muster ----
+_RE_RECHNUNGSDATUM = re.compile(r"Rechnungsdatum\s+(\d{2}\.\d{2}\.\d{4})")
+_RE_DATE = re.compile(r"\b(\d{2}\.\d{2}\.\d{4})\b")
+# 5 CHF-Beträge direkt hintereinander; gesucht wird erst ab 'Mindestzahlung'
+# (str.find + search(pos) statt "Mindestzahlung.*?(...)" mit re.S)
+BETRAEGE_ANCHOR = "Mindestzahlung"
+_RE_BETRAEGE_BLOCK = re.compile(r"CHF\s*[0-9' .]+\d{2}(?:\s+CHF\s*[0-9' .]+\d{2}){4}")
+_RE_CHF_AMOUNT = re.compile(r"CHF\s*([0-9' .]+\d{2})")
 
 
 def find_rechnungsdatum(text: str) -> str | None:
@@ -26,12 +24,12 @@ def find_rechnungsdatum(text: str) -> str | None:
     Sucht explizit nach 'Rechnungsdatum 24.10.2025'.
     Fallback: erstes Datum im Format TT.MM.JJJJ.
     """
-    m = re.search(r"Rechnungsdatum\s+(\d{2}\.\d{2}\.\d{4})", text)
+    m = _RE_RECHNUNGSDATUM.search(text)
     if m:
         return m.group(1)
 
     # Fallback: erstes Datum irgendwo
-    m = re.search(r"\b(\d{2}\.\d{2}\.\d{4})\b", text)
+    m = _RE_DATE.search(text)
     if m:
         return m.group(1)
 
@@ -45,37 +43,21 @@ def find_betraege_block(text: str) -> list[str] | None:
     [Saldo letzte Rechnung, Ihre Zahlungen, Total neue Transaktionen,
      Neuer Saldo, Mindestzahlung]
     """
-    m = re.search(
-        r"Mindestzahlung.*?(CHF\s*[0-9' .]+\d{2}(?:\s+CHF\s*[0-9' .]+\d{2}){4})",
-        text,
-        re.S,
-    )
+    start = text.find(BETRAEGE_ANCHOR)
+    if start < 0:
+        return None
+
+    m = _RE_BETRAEGE_BLOCK.search(text, start + len(BETRAEGE_ANCHOR))
     if not m:
         return None
 
-    line = m.group(1)
-    amounts = re.findall(r"CHF\s*([0-9' .]+\d{2})", line)
+    line = m.group(0)
+    amounts = _RE_CHF_AMOUNT.findall(line)
     if len(amounts) != 5:
         return None
     return amounts
 
 
-def normalize_amount(amount_str: str) -> float | None:
-    """
-    Betrag in float umwandeln.
-    z.B. "1'234.50" oder "1 234,50" -> 1234.5
-    """
-    try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
-
-
 class SwisscardProvider(InvoiceProvider):
 
     # ---------------- Basis-Metadaten ----------------
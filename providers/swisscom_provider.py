@@ -5,13 +5,16 @@ from pathlib import Path
 from typing import Any, Dict, List
 import re
 
-import pdfplumber
-
+from .amount import normalize_amount
 from .base_provider import InvoiceProvider
 from settings import SWISSCOM_DIR, SWISSCOM_CSV
 
-
-
+# ---- Vorkompilierte Muster ----
+_RE_GERMAN_DATE = re.compile(r"\s*(\d{1,2})\.\s+([A-Za-zÄÖÜäöü]+)\s+(\d{4})\s*$")
+_RE_DATUM = re.compile(r"Datum[: ]+(\d{1,2}\.\s+[A-Za-zÄÖÜäöü]+\s+\d{4})")
+_RE_AMOUNT_TOTAL = re.compile(r"Rechnungstotal in CHF inkl\. MWST\s+([0-9' ]+\.\d{2})")
+_RE_AMOUNT_EBILL = re.compile(r"Rechnungsbetrag\s+inkl\. MWST\s+CHF\s+([0-9' ]+\.\d{2})", re.S)
+_RE_AMOUNT_FALLBACK = re.compile(r"Währung\s+CHF\s+Betrag\s+([0-9' ]+\.\d{2})", re.S)
 
 
 MONTHS = {
@@ -31,24 +34,11 @@ MONTHS = {
 }
 
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    """
-    PDF -> reiner Text (alle Seiten).
-    Diesen Helper können später auch Sorter / CSV-Builder benutzen.
-    """
-    chunks: List[str] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            t = page.extract_text() or ""
-            chunks.append(t)
-    return "\n".join(chunks)
-
-
 def parse_german_date(date_str: str) -> str | None:
     """
     Wandelt '6. November 2025' -> '06.11.2025' um.
     """
-    m = re.match(r"\s*(\d{1,2})\.\s+([A-Za-zÄÖÜäöü]+)\s+(\d{4})\s*$", date_str)
+    m = _RE_GERMAN_DATE.match(date_str)
     if not m:
         return None
 
@@ -74,7 +64,7 @@ def find_datum(text: str) -> str | None:
     Sucht nach 'Datum 6. November 2025' oder 'Datum: 6. November 2025'.
     Gibt Datum als 'TT.MM.JJJJ' zurück.
     """
-    m = re.search(r"Datum[: ]+(\d{1,2}\.\s+[A-Za-zÄÖÜäöü]+\s+\d{4})", text)
+    m = _RE_DATUM.search(text)
     if not m:
         return None
     raw = m.group(1)
@@ -88,46 +78,23 @@ def find_amount(text: str) -> str | None:
     Gibt den Betrag als String, z.B. '11.70', zurück.
     """
     # Variante 1: Zusammenfassung
-    m = re.search(
-        r"Rechnungstotal in CHF inkl\. MWST\s+([0-9' ]+\.\d{2})",
-        text
-    )
+    m = _RE_AMOUNT_TOTAL.search(text)
     if m:
         return m.group(1).strip()
 
     # Variante 2: eBill-Block
-    m = re.search(
-        r"Rechnungsbetrag\s+inkl\. MWST\s+CHF\s+([0-9' ]+\.\d{2})",
-        text,
-        re.S,
-    )
+    m = _RE_AMOUNT_EBILL.search(text)
     if m:
         return m.group(1).strip()
 
     # Fallback: letzter Betrag vor 'Betrag' im Zahlteil (sehr grob)
-    m = re.search(r"Währung\s+CHF\s+Betrag\s+([0-9' ]+\.\d{2})", text, re.S)
+    m = _RE_AMOUNT_FALLBACK.search(text)
     if m:
         return m.group(1).strip()
 
     return None
 
 
-def normalize_amount_for_number(amount_str: str) -> float | None:
-    """
-    Betrag in float umwandeln.
-    z.B. "1'234.50" oder "1'234,50" -> 1234.5
-    """
-    try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
-
-
 class SwisscomProvider(InvoiceProvider):
     
     REQUIRED_KEYWORDS = ["Swisscom (Schweiz) AG", "Rechnungstotal in CHF inkl. MWST"]
@@ -165,7 +132,7 @@ class SwisscomProvider(InvoiceProvider):
             amount_str = "0.00"
             amount_num = 0.0
         else:
-            amount_num = normalize_amount_for_number(amount_str) or 0.0
+            amount_num = normalize_amount(amount_str) or 0.0
 
         # Das generische Format für die weitere Verarbeitung:
         return {
@@ -5,91 +5,75 @@ from pathlib import Path
 from typing import Any, Dict, List
 import re
 
-import pdfplumber
-
+from .amount import normalize_amount
 from .base_provider import InvoiceProvider
 from settings import SZKB_DIR, SZKB_CSV
 
 
 
+# ---- Vorkompilierte Muster ----
+_RE_DATE_ANY = re.compile(r"\b(\d{2})\.(\d{2})\.(\d{4})\b")
+_RE_SALDO_LINE = re.compile(r"(Saldo.*)", re.IGNORECASE)
+_RE_SALDO_AMOUNT = re.compile(r"([+-]?\s*CHF\s*)?([+-]?[0-9' ]+\.\d{2})")
+
 # Begriffe rund um Schlusssaldo
 SALDO_KEYWORDS = [
     "Schlusssaldo",
 ]
 
-
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    """
-    PDF -> reiner Text (alle Seiten).
-    """
-    chunks: List[str] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            chunks.append(page.extract_text() or "")
-    return "\n".join(chunks)
+# ganze Zeile, die eines der SALDO_KEYWORDS enthält (ein Scan über den Text)
+_RE_SALDO_KEYWORD_LINE = re.compile(
+    r"^.*(?:" + "|".join(re.escape(k) for k in SALDO_KEYWORDS) + r").*$",
+    re.IGNORECASE | re.MULTILINE,
+)
 
 
-def find_all_dates(text: str) -> List[str]:
+def find_period(text: str) -> tuple[str | None, str | None]:
     """
-    Findet alle Datumsangaben im Format TT.MM.JJJJ.
-    """
-    return re.findall(r"\b(\d{2}\.\d{2}\.\d{4})\b", text)
-
+    Bestimme Zeitraum (von, bis) als frühestes / spätestes Datum TT.MM.JJJJ.
+    Ein Durchlauf mit min/max über den Schlüssel JJJJMMTT, ohne Liste + sort.
 
-def find_period_from_dates(dates: List[str]) -> tuple[str | None, str | None]:
+    Früher wurden die Daten als Text TT.MM.JJJJ sortiert; das stimmt über
+    Monats-/Jahresgrenzen nicht (als Text kommt 01.10.2025 vor 30.09.2025).
+    Bestehende CSVs können deshalb andere Von_Datum/Bis_Datum enthalten als
+    ein neuer Lauf; build_szkb_csv baut sie mit den korrekten Werten neu.
     """
-    Bestimme Zeitraum (von, bis) aus allen gefundenen Datumsangaben.
-    """
-    if not dates:
-        return None, None
-    dates_sorted = sorted(dates)
-    return dates_sorted[0], dates_sorted[-1]
+    lo = hi = None
+    von = bis = None
+    for m in _RE_DATE_ANY.finditer(text):
+        key = m.group(3) + m.group(2) + m.group(1)
+        if lo is None or key < lo:
+            lo, von = key, m.group(0)
+        if hi is None or key > hi:
+            hi, bis = key, m.group(0)
+    return von, bis
 
 
 def find_saldo(text: str) -> str | None:
     """
     Sucht nach einer Zeile mit 'Schlusssaldo' (oder allgemein 'Saldo'),
     und extrahiert den Betrag.
+    Massgebend ist jeweils der letzte Treffer (case-insensitiv), gesucht mit
+    einem MULTILINE-Regex direkt im Text, ohne splitlines() und upper() pro
+    Zeile.
     """
-    lines: List[str] = []
-
-    for line in text.splitlines():
-        if any(k.upper() in line.upper() for k in SALDO_KEYWORDS):
-            lines.append(line)
-
-    if not lines:
+    last = None
+    for last in _RE_SALDO_KEYWORD_LINE.finditer(text):
+        pass
+    if last is None:
         # Fallback: irgendwo im Text nach 'Saldo' suchen
-        fallback = re.findall(r"(Saldo.*)", text, flags=re.IGNORECASE)
-        lines.extend(fallback)
-
-    if not lines:
+        for last in _RE_SALDO_LINE.finditer(text):
+            pass
+    if last is None:
         return None
-
-    last_line = lines[-1]
+    line = last.group(0)
 
     # Betrag herausparsen (CHF optional, Vorzeichen optional)
-    m = re.search(r"([+-]?\s*CHF\s*)?([+-]?[0-9' ]+\.\d{2})", last_line)
+    m = _RE_SALDO_AMOUNT.search(line)
     if not m:
         return None
 
-    amount_str = m.group(2)
-    return amount_str.strip()
-
-
-def normalize_amount(amount_str: str) -> float | None:
-    """
-    Betragstring in float umwandeln.
-    z.B. "1'234.50" oder "- 1'234,50" -> 1234.5 / -1234.5
-    """
-    try:
-        s = amount_str.replace("'", "").replace(" ", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        return float(s)
-    except Exception:
-        return None
+    return m.group(2).strip()
 
 
 class SZKBProvider(InvoiceProvider):
@@ -114,6 +98,15 @@ class SZKBProvider(InvoiceProvider):
     def csv_header(self) -> List[str]:
         return ["Von_Datum", "Bis_Datum", "Schlusssaldo", "Datei"]
 
+    def csv_row(self, data: Dict[str, Any]) -> tuple:
+        saldo = data.get("saldo", None)
+        return (
+            data.get("from_date", "") or "",
+            data.get("to_date", "") or "",
+            "" if saldo is None else format(saldo, ".2f"),
+            data.get("file", ""),
+        )
+
     # ---------------- Parsing ----------------
 
     def parse_invoice(self, text: str, filename: str) -> Dict[str, Any]:
@@ -126,8 +119,7 @@ class SZKBProvider(InvoiceProvider):
             - amount: für generische Verwendung = saldo_num
         """
 
-        dates = find_all_dates(text)
-        von, bis = find_period_from_dates(dates)
+        von, bis = find_period(text)
 
         saldo_str = find_saldo(text)
         if saldo_str:
@@ -2,7 +2,10 @@
 import argparse
 import os
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # nur Dateien schreiben, kein GUI-Backend (vor pyplot setzen)
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
@@ -10,6 +13,29 @@ import matplotlib.dates as mdates
 MONTH_FMT = mdates.DateFormatter("%b %y")   # Jan 24, Feb 24, …
 MONTH_LOC = mdates.MonthLocator()           # Monatstakte
 
+# Datumsformat aller CSV-Builder (TT.MM.JJJJ); fest vorgegeben statt dayfirst-Erkennung
+CSV_DATE_FMT = "%d.%m.%Y"
+
+# Nur diese Spalten werden gebraucht (Datei usw. gar nicht erst einlesen);
+# Datumsspalten als Text, die Umwandlung macht to_datetime mit festem Format
+USED_COLUMNS = {"Rechnungsdatum", "Betrag", "Bis_Datum", "Schlusssaldo"}
+CSV_DTYPES = {"Rechnungsdatum": str, "Bis_Datum": str}
+
+
+def _swiss_to_num(s: pd.Series) -> pd.Series:
+    """
+    Betragsspalte -> float, vektorisiert über die ganze Spalte.
+    Schon numerische Spalten (CSV der Builder) gehen direkt durch; Text wie
+    "1'234.50" oder "1 234,50" wird wie providers.amount.normalize_amount
+    behandelt, Unlesbares wird NaN.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    t = s.astype(str).str.replace(r"[' \xa0]", "", regex=True)
+    comma = t.str.contains(",", regex=False)
+    t = t.mask(comma, t.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(t, errors="coerce")
+
 
 def load_and_normalize(csv_path: str, sep: str = ";"):
     """
@@ -22,21 +48,25 @@ def load_and_normalize(csv_path: str, sep: str = ";"):
       Wert (float)
       mode ("invoice" oder "statement")
     """
-    df = pd.read_csv(csv_path, sep=sep, encoding="utf-8")
+    df = pd.read_csv(
+        csv_path,
+        sep=sep,
+        encoding="utf-8",
+        usecols=lambda c: c in USED_COLUMNS,
+        dtype=CSV_DTYPES,
+    )
 
     # Rechnungen
     if "Rechnungsdatum" in df.columns and "Betrag" in df.columns:
         mode = "invoice"
-        df = df.copy()
-        df["Datum"] = pd.to_datetime(df["Rechnungsdatum"], dayfirst=True, errors="coerce")
-        df["Wert"] = pd.to_numeric(df["Betrag"], errors="coerce")
+        df["Datum"] = pd.to_datetime(df["Rechnungsdatum"], format=CSV_DATE_FMT, errors="coerce", cache=True)
+        df["Wert"] = _swiss_to_num(df["Betrag"])
 
     # Kontoauszug
     elif "Bis_Datum" in df.columns and "Schlusssaldo" in df.columns:
         mode = "statement"
-        df = df.copy()
-        df["Datum"] = pd.to_datetime(df["Bis_Datum"], dayfirst=True, errors="coerce")
-        df["Wert"] = pd.to_numeric(df["Schlusssaldo"], errors="coerce")
+        df["Datum"] = pd.to_datetime(df["Bis_Datum"], format=CSV_DATE_FMT, errors="coerce", cache=True)
+        df["Wert"] = _swiss_to_num(df["Schlusssaldo"])
 
     else:
         raise ValueError(
@@ -44,7 +74,7 @@ def load_and_normalize(csv_path: str, sep: str = ";"):
             "Erwartet entweder (Rechnungsdatum,Betrag_num) oder (Bis_Datum,Schlusssaldo_num)."
         )
 
-    df = df.dropna(subset=["Datum", "Wert"])
+    df = df[["Datum", "Wert"]].dropna()
     df = df.sort_values("Datum")
 
     return df, mode
@@ -92,12 +122,10 @@ def plot_invoice(df, von, bis, label, outpath):
     if df.empty:
         raise ValueError("Keine Daten im gewählten Zeitraum.")
 
-    # Monatssumme
-    df["Monat"] = df["Datum"].dt.to_period("M")
-    monthly = df.groupby("Monat")["Wert"].sum()
-
-    # Index als echte Timestamps für Plotten
-    x = monthly.index.to_timestamp()
+    # Monatssumme direkt auf dem DatetimeIndex (Monatsanfang als Zeitstempel);
+    # Monate ohne Einträge fallen wie bisher weg (min_count=1 -> NaN -> dropna)
+    monthly = df.set_index("Datum")["Wert"].resample("MS").sum(min_count=1).dropna()
+    x = monthly.index
 
     fig, ax = plt.subplots(figsize=(10, 6))
     ax.bar(x, monthly.values, width=20)  # breite Balken
@@ -117,8 +145,10 @@ def plot_invoice(df, von, bis, label, outpath):
     )
     fig.text(0.02, 0.02, text)
 
-    fig.tight_layout(rect=(0, 0.06, 1, 1))
-    fig.savefig(outpath)
+    # feste Ränder statt tight_layout: kein zusätzlicher Layout-Durchlauf,
+    # unten Platz für den Textblock
+    fig.subplots_adjust(left=0.08, right=0.97, bottom=0.22, top=0.93)
+    fig.savefig(outpath, bbox_inches=None)
     plt.close(fig)
 
 
@@ -131,19 +161,26 @@ def plot_statement(df, von, bis, label, outpath):
         raise ValueError("Keine Daten im gewählten Zeitraum.")
 
     df = df.sort_values("Datum")
-    df["Delta"] = df["Wert"].diff()
+    datum = df["Datum"]  # als Series: gleiche Datumsachse wie bisher (Konverter)
+    wert = df["Wert"].to_numpy(dtype="float64")
+
+    # Differenz zum Vorgänger direkt auf dem Array (wie Series.diff(), ohne
+    # zusätzliche Spalte im DataFrame)
+    delta = np.empty_like(wert)
+    delta[0] = np.nan
+    np.subtract(wert[1:], wert[:-1], out=delta[1:])
 
     fig, ax1 = plt.subplots(figsize=(10, 6))
 
     # Saldo-Linie
-    ax1.plot(df["Datum"], df["Wert"], marker="o", color="tab:blue", label="Saldo")
+    ax1.plot(datum, wert, marker="o", color="tab:blue", label="Saldo")
     ax1.set_ylabel("Kontostand [CHF]", color="tab:blue")
     ax1.tick_params(axis="y", labelcolor="tab:blue")
     ax1.grid(True, linestyle=":", linewidth=0.5)
 
     # Delta-Achse
     ax2 = ax1.twinx()
-    ax2.bar(df["Datum"], df["Delta"], width=10, alpha=0.3, color="tab:red")
+    ax2.bar(datum, delta, width=10, alpha=0.3, color="tab:red")
     ax2.set_ylabel("Δ Saldo [CHF]", color="tab:red")
     ax2.tick_params(axis="y", labelcolor="tab:red")
 
@@ -155,15 +192,15 @@ def plot_statement(df, von, bis, label, outpath):
     text = (
         f"Von: {von.date()}\n"
         f"Bis: {bis.date()}\n"
-        f"Letzter Saldo: {df['Wert'].iloc[-1]:.2f} CHF\n"
-        f"Min: {df['Wert'].min():.2f} CHF\n"
-        f"Max: {df['Wert'].max():.2f} CHF\n"
+        f"Letzter Saldo: {wert[-1]:.2f} CHF\n"
+        f"Min: {np.nanmin(wert):.2f} CHF\n"
+        f"Max: {np.nanmax(wert):.2f} CHF\n"
         f"Einträge: {len(df)}"
     )
     fig.text(0.02, 0.02, text)
 
-    fig.tight_layout(rect=(0, 0.06, 1, 1))
-    fig.savefig(outpath)
+    fig.subplots_adjust(left=0.08, right=0.92, bottom=0.28, top=0.88)
+    fig.savefig(outpath, bbox_inches=None)
     plt.close(fig)
 
 
@@ -4,16 +4,62 @@ from __future__ import annotations
 """
 Orchestrator:
 1. Neue PDFs im BASE_DIR einsortieren (scan_sort_all)
-2. CSVs für Swisscom, Swisscard, SZKB neu aufbauen
+2. Veraltete CSVs für Swisscom, Swisscard, SZKB neu aufbauen
+
+sort_all liest jedes neue PDF nur einmal: erkennen, parsen und die Zeile an
+die CSV des Providers anhängen. Ein Builder läuft danach nur, wenn seine CSV
+fehlt oder ihre Spalte "Datei" nicht genau die PDFs im Ordner nennt (z.B.
+von Hand in den Provider-Ordner gelegt oder gelöscht); er liest dann alle
+PDFs im Ordner, meist aus dem Text-Cache (TEXT_CACHE_DIR). Für einen
+kompletten Neuaufbau die build_*_csv-Skripte direkt starten.
 """
 
+import csv
+import os
+from pathlib import Path
+
 from build import (
     build_swisscom_csv,
     build_swisscard_csv,
     build_szkb_csv,
 )
+from settings import (
+    SWISSCOM_DIR, SWISSCOM_CSV,
+    SWISSCARD_DIR, SWISSCARD_CSV,
+    SZKB_DIR, SZKB_CSV,
+)
 import sort_all
 
+BUILDERS = [
+    (SWISSCOM_DIR, SWISSCOM_CSV, build_swisscom_csv),
+    (SWISSCARD_DIR, SWISSCARD_CSV, build_swisscard_csv),
+    (SZKB_DIR, SZKB_CSV, build_szkb_csv),
+]
+
+
+def csv_is_current(pdf_dir: Path, csv_path: Path) -> bool:
+    """
+    True, wenn die CSV existiert und ihre Spalte "Datei" genau die PDFs im
+    Ordner nennt. PDFs, die der Builder nicht auswerten kann (kein Text,
+    falscher Provider), fehlen in der CSV; solche Ordner werden bei jedem
+    Lauf neu aufgebaut (dank Text-Cache ohne neues Extrahieren).
+    """
+    if not csv_path.exists():
+        return False
+
+    with os.scandir(pdf_dir) as it:
+        pdf_names = {e.name for e in it if e.name.lower().endswith(".pdf") and e.is_file()}
+
+    with csv_path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";")
+        header = next(reader, [])
+        if "Datei" not in header:
+            return False
+        col = header.index("Datei")
+        csv_names = {row[col] for row in reader if len(row) > col}
+
+    return csv_names == pdf_names
+
 
 def main():
     print("=====================================")
@@ -23,12 +69,18 @@ def main():
     sort_all.main()
 
     print("\n=====================================")
-    print("   Schritt 2: CSVs neu erzeugen")
+    print("   Schritt 2: veraltete CSVs neu erzeugen")
     print("=====================================\n")
 
-    build_swisscom_csv.main()
-    build_swisscard_csv.main()
-    build_szkb_csv.main()
+    # nach dem Sortieren prüfen: sort_all hat neue Zeilen bereits angehängt
+    stale = [
+        builder for pdf_dir, csv_path, builder in BUILDERS
+        if not csv_is_current(pdf_dir, csv_path)
+    ]
+    if not stale:
+        print("Alle CSVs aktuell, neue Zeilen wurden beim Sortieren angehängt.")
+    for builder in stale:
+        builder.main()
 
     print("\n=====================================")
     print("   Fertig: Sortierung + CSV-Build")
@@ -37,4 +89,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -32,13 +32,15 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 # ---------------------------------------------------------
 # 3. Basis-Ordner für alle Rechnungen
 # ---------------------------------------------------------
-BASE_DIR = Path(cfg["BASE_DIR"]).expanduser().resolve()
+# absolute() statt resolve(): reine Pfad-Operation, kein Auflösen von
+# Symlinks/Junctions über das Dateisystem (auf OneDrive-Pfaden spürbar)
+BASE_DIR = Path(cfg["BASE_DIR"]).expanduser().absolute()
 
 
 # ---------------------------------------------------------
 # 4. Python-Interpreter aus config.json
 # ---------------------------------------------------------
-PYTHON_EXE = Path(cfg.get("PYTHON_EXE", sys.executable)).resolve()
+PYTHON_EXE = Path(cfg.get("PYTHON_EXE", sys.executable)).expanduser().absolute()
 
 
 # ---------------------------------------------------------
@@ -58,10 +60,15 @@ SZKB_CSV          = SZKB_DIR / "szkb_privatkonto.csv"
 STROM_CSV         = STROM_DIR / "strom.csv"
 STROM_VERIFIED_CSV = STROM_DIR / "strom_verified.csv"
 
+# Cache für extrahierten PDF-Text (Schlüssel = Hash des PDF-Inhalts)
+TEXT_CACHE_DIR = SCRIPT_DIR / ".cache" / "pdftext"
+
 
 # Ordner automatisch erstellen, wenn sie fehlen
+# (Normalfall: alle vorhanden -> nur ein stat() pro Ordner)
 for p in [BASE_DIR, SWISSCOM_DIR, SWISSCARD_DIR, SZKB_DIR, STROM_DIR]:
-    p.mkdir(parents=True, exist_ok=True)
+    if not p.is_dir():
+        p.mkdir(parents=True, exist_ok=True)
 
 
 # ---------------------------------------------------------
@@ -80,4 +87,5 @@ if __name__ == "__main__":
     print("SZKB_CSV        =", SZKB_CSV)    
     print("STROM_CSV       =", STROM_CSV)
     print("STROM_VERIFIED_CSV =", STROM_VERIFIED_CSV)
+    print("TEXT_CACHE_DIR  =", TEXT_CACHE_DIR)
     
\ No newline at end of file
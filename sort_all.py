@@ -1,25 +1,57 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
 
-import pdfplumber
-import shutil
-
-from settings import BASE_DIR, SWISSCOM_DIR, SWISSCARD_DIR, SZKB_DIR
+from settings import BASE_DIR, SWISSCOM_DIR, SWISSCARD_DIR, SZKB_DIR, TEXT_CACHE_DIR
 from providers.swisscom_provider import SwisscomProvider
 from providers.swisscard_provider import SwisscardProvider
 from providers.szkb_provider import SZKBProvider
-
-
-def extract_text(pdf_path: Path) -> str:
-    """PDF -> reiner Text (alle Seiten)."""
-    chunks: List[str] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for page in pdf.pages:
-            chunks.append(page.extract_text() or "")
-    return "\n".join(chunks)
+from providers.fileops import move_file
+from providers.pdf_text import probe_pages
+from providers.provider_match import ProviderMatcher
+from providers.base_provider import InvoiceProvider
+
+
+def classify(
+    matcher: ProviderMatcher, pdf_path: Path
+) -> tuple[Path, str | None, bool, tuple | None, str | None]:
+    """
+    Worker für den Prozess-Pool:
+    PDF -> (Pfad, Provider-Name, hat Text, CSV-Zeile, Fehlermeldung).
+    Nach dem Erkennen wird der Rest des PDFs gleich mitgelesen und geparst,
+    damit die CSV-Zeile ohne zweites Extrahieren im Builder entsteht.
+    Nur Lesen + Erkennen + Parsen; verschoben wird im Hauptprozess.
+    """
+    try:
+        # erst der Briefkopf, dann Seite für Seite, bis ein Provider passt
+        provider, text = probe_pages(
+            pdf_path, matcher.match, TEXT_CACHE_DIR, header_first=True, full_text=True
+        )
+        row = None
+        if provider is not None:
+            row = provider.csv_row(provider.parse_invoice(text, pdf_path.name))
+    except Exception as e:
+        return pdf_path, None, False, None, str(e)
+    return pdf_path, provider.name if provider is not None else None, bool(text.strip()), row, None
+
+
+def append_csv_rows(provider: InvoiceProvider, rows: list[tuple]) -> bool:
+    """
+    Hängt die Zeilen der neu einsortierten PDFs an die CSV des Providers an.
+    Fehlt die CSV, wird nichts geschrieben (False): sie enthielte sonst nur
+    die neuen PDFs; der Builder baut sie dann komplett neu auf.
+    """
+    csv_path = provider.csv_path
+    if not csv_path.exists():
+        return False
+    with csv_path.open("a", newline="", encoding="utf-8") as f:
+        csv.writer(f, delimiter=";").writerows(rows)
+    return True
 
 
 def main():
@@ -32,6 +64,9 @@ def main():
         SwisscardProvider(),
         # später: StromProvider(), ...
     ]
+    # alle Keywords aller Provider in einem Durchlauf pro PDF prüfen
+    matcher = ProviderMatcher(providers)
+    by_name = {p.name: p for p in providers}
 
     print("========== PDF Sorter ==========")
     print(f"BASE_DIR / INBOX: {inbox}")
@@ -41,47 +76,69 @@ def main():
     print(f"  SZKB Konto:  {SZKB_DIR}")
     print("================================\n")
 
-    # nur PDFs direkt im inbox-Ordner (keine Unterordner)
-    pdf_files = sorted(p for p in inbox.glob("*.pdf") if p.is_file())
+    # nur PDFs direkt im inbox-Ordner (keine Unterordner);
+    # os.scandir: is_file() ohne extra stat() pro Eintrag
+    with os.scandir(inbox) as it:
+        pdf_files = sorted(
+            (Path(e.path) for e in it if e.name.lower().endswith(".pdf") and e.is_file()),
+            key=lambda p: p.name,
+        )
 
     print(f"Gefundene PDFs im Inbox-Ordner: {len(pdf_files)}\n")
 
     moved = 0
     unmatched = []
-
-    for pdf_path in pdf_files:
-        print(f"📄 {pdf_path.name}")
-
-        try:
-            text = extract_text(pdf_path)
-        except Exception as e:
-            print(f"  [WARNUNG] Fehler beim Lesen: {e}")
-            unmatched.append(pdf_path)
-            continue
-
-        matched_provider = None
-
-        for provider in providers:
-            if provider.matches(text):
-                matched_provider = provider
-                break
-
-        if matched_provider is None:
-            print("  ⚠ Kein Provider erkannt – Datei bleibt im Inbox-Ordner.")
-            unmatched.append(pdf_path)
-            continue
-
-        target_dir = matched_provider.target_dir
-        target_dir.mkdir(parents=True, exist_ok=True)
-        target_path = target_dir / pdf_path.name
-
-        try:
-            shutil.move(str(pdf_path), str(target_path))
-            print(f"  ✔ Erkannt als: {matched_provider.name}, verschoben nach: {target_path}")
-            moved += 1
-        except Exception as e:
-            print(f"  [WARNUNG] Fehler beim Verschieben: {e}")
-            unmatched.append(pdf_path)
+    no_text = []
+    # neue CSV-Zeilen pro Provider (Reihenfolge wie pdf_files)
+    new_rows: dict[str, list[tuple]] = {p.name: [] for p in providers}
+
+    # Lesen + Erkennen parallel, Verschieben seriell im Hauptprozess
+    # (map() liefert in Eingabereihenfolge -> Ausgabe bleibt nach Dateiname sortiert)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(partial(classify, matcher), pdf_files, chunksize=4)
+
+        for pdf_path, provider_name, has_text, row, error in results:
+            print(f"📄 {pdf_path.name}")
+
+            if error is not None:
+                print(f"  [WARNUNG] Fehler beim Lesen: {error}")
+                unmatched.append(pdf_path)
+                continue
+
+            if not has_text:
+                # reiner Scan ohne Textebene: Keyword-Suche sinnlos, braucht OCR
+                print("  [INFO] Kein extrahierbarer Text (Scan?) – Datei bleibt im Inbox-Ordner.")
+                no_text.append(pdf_path)
+                continue
+
+            if provider_name is None:
+                print("  ⚠ Kein Provider erkannt – Datei bleibt im Inbox-Ordner.")
+                unmatched.append(pdf_path)
+                continue
+
+            matched_provider = by_name[provider_name]
+            target_dir = matched_provider.target_dir
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target_path = target_dir / pdf_path.name
+            # gleichnamiges PDF schon einsortiert -> steht bereits in der CSV
+            already_listed = target_path.exists()
+
+            try:
+                move_file(pdf_path, target_path)
+                print(f"  ✔ Erkannt als: {matched_provider.name}, verschoben nach: {target_path}")
+                moved += 1
+                if not already_listed:
+                    new_rows[provider_name].append(row)
+            except Exception as e:
+                print(f"  [WARNUNG] Fehler beim Verschieben: {e}")
+                unmatched.append(pdf_path)
+
+    # CSV-Zeilen anhängen (ein open() pro CSV)
+    missing_csv = []
+    for provider in providers:
+        rows = new_rows[provider.name]
+        if rows and not append_csv_rows(provider, rows):
+            missing_csv.append(provider)
 
     print("\n========== Zusammenfassung ==========")
     print(f"Verschobene PDFs:         {moved}")
@@ -90,6 +147,12 @@ def main():
         print("Unmatched Dateien:")
         for p in unmatched:
             print(f"  - {p.name}")
+    if no_text:
+        print(f"Ohne Text (OCR nötig):    {len(no_text)}")
+        for p in no_text:
+            print(f"  - {p.name}")
+    for provider in missing_csv:
+        print(f"[HINWEIS] CSV fehlt, bitte neu aufbauen: {provider.csv_path}")
     print("=====================================")
 
 
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 from pathlib import Path
 
-from providers.swisscom_provider import SwisscomProvider, extract_text_from_pdf
+from providers.pdf_text import extract_text_from_pdf
+from providers.swisscom_provider import SwisscomProvider
 
 
 def test_pdf(path: str):